@@ -0,0 +1,99 @@
+"""This file benchmarks columnar unit conversion and scaling against converting one ingredient at a time."""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from columnar import IngredientColumns  # noqa: E402
+from ingredient import Ingredient  # noqa: E402
+from parsed_recipe import ParsedRecipe  # noqa: E402
+
+# Measurements in the proportions they roughly appear in on TheMealDB, with
+# countable ingredients and ingredients without quantity mixed in
+MEASUREMENTS = ['g', 'g', 'ml', 'kg', 'l', 'tsp', 'tbsp', 'tbsp', 'cup', 'cups', 'oz', 'lb',
+                Ingredient.COUNTABLE_MEASUREMENT, Ingredient.COUNTABLE_MEASUREMENT, '']
+NAMES = ['flour', 'sugar', 'butter', 'milk', 'eggs', 'salt', 'olive oil', 'garlic',
+         'onion', 'chicken', 'rice', 'stock', 'tomatoes', 'cream', 'pepper']
+
+
+def make_recipes(n, ingredients_per_recipe, seed):
+    """
+    Makes synthetic recipes with only ingredients, since conversion only reads those.
+    """
+    rng = random.Random(seed)
+    recipes = []
+    for i in range(n):
+        ingredients = []
+        for _ in range(ingredients_per_recipe):
+            measurement = rng.choice(MEASUREMENTS)
+            if measurement == '':
+                quantity = Ingredient.NO_QUANTITY
+            else:
+                quantity = rng.choice([0.25, 0.5, 1, 2, 3, 4, 100, 250, 500])
+            ingredients.append(Ingredient(
+                rng.choice(NAMES), quantity, measurement, []))
+        recipes.append(ParsedRecipe(f'Recipe {i}', [], ingredients, {}))
+    return recipes
+
+
+def transform_each(recipes, target_unit, ratio):
+    """
+    Converts and scales one ingredient at a time, as recipe views do.
+    """
+    return [[ingredient.get_transformed_quantity(target_unit, ratio)
+             for ingredient in recipe.get_ingredients()] for recipe in recipes]
+
+
+def check(columns, transformed):
+    """
+    Checks that columnar results match the per-ingredient results.
+    """
+    expected_quantities = np.array(
+        [q for recipe in transformed for q, _ in recipe], dtype=np.float64)
+    expected_units = [m for recipe in transformed for _, m in recipe]
+    units = [columns.units[code] for code in columns.unit_codes]
+    if not np.array_equal(columns.quantities, expected_quantities):
+        sys.exit('Quantities differ')
+    if units != expected_units:
+        sys.exit('Units differ')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipes', type=int, default=100000,
+                        help='Number of synthetic recipes')
+    parser.add_argument('--ingredients', type=int, default=10,
+                        help='Number of ingredients per recipe')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed for generating recipes')
+    args = parser.parse_args()
+
+    recipes = make_recipes(args.recipes, args.ingredients, args.seed)
+    start = time.perf_counter()
+    columns = IngredientColumns.from_recipes(recipes)
+    print(f'Built columns for {args.recipes} recipes '
+          f'({len(columns.names)} ingredients) in {time.perf_counter() - start:.3f}s')
+
+    print(f'{"operation":>22} {"per ingredient (s)":>20} {"columnar (s)":>14} {"speedup":>10}')
+    for target_unit, ratio in [('METRIC', 1), ('IMPERIAL', 1), (None, 2), ('METRIC', 2)]:
+        start = time.perf_counter()
+        transformed = transform_each(recipes, target_unit, ratio)
+        previous = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = columns.translate_portion_size(ratio).convert_units(target_unit)
+        current = time.perf_counter() - start
+
+        check(result, transformed)
+        name = f'{target_unit or "scale"} x{ratio}'
+        print(f'{name:>22} {previous:>20.3f} {current:>14.3f} {previous / current:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
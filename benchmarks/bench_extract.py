@@ -0,0 +1,207 @@
+"""This file benchmarks the extraction pipeline over offline recipes in TheMealDB's format.
+
+The default fixture holds hand-written recipes in the format the API returns,
+so the benchmark runs without network access. Results can be saved as a
+baseline and later runs are compared against it.
+"""
+
+import argparse
+import functools
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+import extract  # noqa: E402
+import model  # noqa: E402
+from download import process_meal  # noqa: E402
+
+DEFAULT_FIXTURE = os.path.join(BENCHMARKS_DIR, 'fixtures', 'meals.json')
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+
+# Functions in extract.py timed on their own. Times include nested stages.
+STAGES = ['preprocess', 'segment_instructions', 'extract_ingredients', 'extract_steps',
+          'extract_tools', 'extract_time_parameters', 'extract_temperature_parameters',
+          'compile_tools']
+
+
+class CountingNLP:
+    """
+    Class representing a spaCy model that counts how often it is run.
+    """
+
+    def __init__(self, nlp):
+        self.nlp = nlp
+        self.calls = 0
+        self.texts = 0
+
+    def __call__(self, text, **kwargs):
+        self.calls += 1
+        self.texts += 1
+        return self.nlp(text, **kwargs)
+
+    def pipe(self, texts, **kwargs):
+        texts = list(texts)
+        self.calls += 1
+        self.texts += len(texts)
+        return self.nlp.pipe(texts, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.nlp, name)
+
+
+class StageTimer:
+    """
+    Class representing the time spent in and the number of calls to each stage.
+    """
+
+    def __init__(self):
+        self.seconds = {stage: 0 for stage in STAGES}
+        self.calls = {stage: 0 for stage in STAGES}
+
+    def wrap(self, stage, f):
+        @functools.wraps(f)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+                self.calls[stage] += 1
+        return timed
+
+    def reset(self):
+        for stage in STAGES:
+            self.seconds[stage] = 0
+            self.calls[stage] = 0
+
+
+def read_fixture(path):
+    """
+    Reads raw recipes from a fixture with the same format as the API's search results.
+    """
+    with open(path, encoding='utf-8') as f:
+        return [process_meal(meal) for meal in json.load(f)['meals']]
+
+
+def run(raw_recipes, repeat):
+    """
+    Extracts every recipe repeat times.
+
+    Returns:
+        Seconds spent.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for raw_recipe in raw_recipes:
+            extract.extract(raw_recipe)
+    return time.perf_counter() - start
+
+
+def benchmark(raw_recipes, repeat):
+    """
+    Measures the pipeline over the recipes.
+
+    Args:
+        raw_recipes: Raw recipes to extract.
+        repeat: Number of times to extract every recipe.
+
+    Returns:
+        Dictionary of results that can be saved as a baseline.
+    """
+    start = time.perf_counter()
+    nlp = CountingNLP(model.get_nlp())
+    load_time = time.perf_counter() - start
+    model._nlp = nlp
+
+    timer = StageTimer()
+    for stage in STAGES:
+        setattr(extract, stage, timer.wrap(stage, getattr(extract, stage)))
+
+    # Warm up caches inside spaCy before timing
+    run(raw_recipes, 1)
+    timer.reset()
+    nlp.calls = nlp.texts = 0
+
+    wall_time = run(raw_recipes, repeat)
+    recipes = len(raw_recipes) * repeat
+
+    # Traced separately, since tracing slows down allocations
+    tracemalloc.start()
+    run(raw_recipes, 1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'recipes': recipes,
+        'model_load_time': load_time,
+        'wall_time': wall_time,
+        'recipes_per_sec': recipes / wall_time,
+        'nlp_calls_per_recipe': nlp.calls / recipes,
+        'nlp_texts_per_recipe': nlp.texts / recipes,
+        'peak_traced_bytes': peak,
+        'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        'stages': {stage: {'seconds_per_recipe': timer.seconds[stage] / recipes,
+                           'calls_per_recipe': timer.calls[stage] / recipes}
+                   for stage in STAGES}
+    }
+
+
+def show_results(results, baseline=None):
+    """
+    Displays results, with the change from the baseline if given.
+    """
+    def row(name, value, baseline_value):
+        line = f'{name:>36} {value:>14.4g}'
+        if baseline_value is not None:
+            change = (value - baseline_value) / baseline_value * 100 if baseline_value else 0
+            line += f' {baseline_value:>14.4g} {change:>+9.1f}%'
+        print(line)
+
+    header = f'{"metric":>36} {"current":>14}'
+    if baseline:
+        header += f' {"baseline":>14} {"change":>10}'
+    print(f'{results["recipes"]} recipes extracted')
+    print(header)
+    for key in ['model_load_time', 'wall_time', 'recipes_per_sec', 'nlp_calls_per_recipe',
+                'nlp_texts_per_recipe', 'peak_traced_bytes', 'max_rss_bytes']:
+        row(key, results[key], baseline.get(key) if baseline else None)
+    for stage in STAGES:
+        for key, value in results['stages'][stage].items():
+            baseline_value = baseline['stages'].get(stage, {}).get(
+                key) if baseline else None
+            row(f'{stage}.{key}', value, baseline_value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fixture', default=DEFAULT_FIXTURE,
+                        help='JSON file with meals as returned by the API')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of times to extract every recipe')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='Baseline results to compare against, if the file exists')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Save the results as the new baseline')
+    args = parser.parse_args()
+
+    results = benchmark(read_fixture(args.fixture), args.repeat)
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    show_results(results, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Saved baseline to {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
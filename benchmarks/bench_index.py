@@ -0,0 +1,103 @@
+"""This file benchmarks inverted index queries against scanning every parsed recipe."""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index import INGREDIENT, TOOL, InvertedIndex, get_terms, normalize  # noqa: E402
+
+INGREDIENTS = ['chickpeas', 'tahini', 'garlic', 'lemon juice', 'olive oil', 'onion', 'flour',
+               'butter', 'sugar', 'eggs', 'milk', 'salt', 'black pepper', 'rice', 'chicken',
+               'beef', 'tomatoes', 'cumin', 'paprika', 'coriander', 'ginger', 'soy sauce',
+               'honey', 'cream', 'cheddar cheese', 'spinach', 'potatoes', 'carrots', 'lentils']
+TOOLS = ['pan', 'oven', 'food processor', 'bowl', 'whisk', 'saucepan', 'baking tray',
+         'blender', 'frying pan', 'wok']
+
+QUERIES = [
+    (['chickpeas', 'tahini'], [], True),
+    ([], ['food processor'], True),
+    (['chickpeas', 'tahini'], ['food processor'], True),
+    (['garlic', 'ginger', 'soy sauce'], ['wok'], True),
+    (['lentils', 'spinach'], [], False),
+]
+
+
+def make_records(n, seed):
+    """
+    Makes synthetic parsed recipes with only the fields the index reads.
+    """
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        ingredients = rng.sample(INGREDIENTS, rng.randint(5, 12))
+        tools = rng.sample(TOOLS, rng.randint(1, 4))
+        steps = [{'ingredients': rng.sample(range(len(ingredients)), 2), 'tools': [rng.choice(tools)]}
+                 for _ in range(rng.randint(3, 8))]
+        records.append({'id': str(50000 + i), 'name': f'Recipe {i}',
+                        'ingredients': [{'name': name} for name in ingredients],
+                        'tools': {tool: 0 for tool in tools}, 'steps': steps})
+    return records
+
+
+def scan(records, ingredients, tools, match_all):
+    """
+    Finds recipes by checking every recipe's ingredients and tools.
+    """
+    wanted = [f'{INGREDIENT}:{normalize(name)}' for name in ingredients] + \
+        [f'{TOOL}:{normalize(name)}' for name in tools]
+    result = []
+    for record in records:
+        terms = set()
+        for ingredient in record['ingredients']:
+            terms |= get_terms(INGREDIENT, ingredient['name'])
+        for tool in record['tools']:
+            terms |= get_terms(TOOL, tool)
+        found = [term in terms for term in wanted]
+        if all(found) if match_all else any(found):
+            result.append((record['id'], record['name']))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipes', type=int, default=100000,
+                        help='Number of synthetic recipes')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed for generating recipes')
+    args = parser.parse_args()
+
+    records = make_records(args.recipes, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        index = InvertedIndex(os.path.join(directory, 'index.sqlite3'))
+        start = time.perf_counter()
+        index.build(records)
+        print(f'Built index over {args.recipes} recipes in {time.perf_counter() - start:.1f}s')
+
+        print(f'{"query":>48} {"matches":>8} {"scan (ms)":>10} {"cold (ms)":>10} {"warm (ms)":>10}')
+        for ingredients, tools, match_all in QUERIES:
+            start = time.perf_counter()
+            expected = scan(records, ingredients, tools, match_all)
+            scanned = time.perf_counter() - start
+
+            index.postings.clear()
+            start = time.perf_counter()
+            result = index.find_recipes(ingredients, tools, match_all)
+            cold = time.perf_counter() - start
+            start = time.perf_counter()
+            index.find_recipes(ingredients, tools, match_all)
+            warm = time.perf_counter() - start
+
+            if result != expected:
+                sys.exit(f'Results differ for {ingredients} {tools}')
+            name = (' AND ' if match_all else ' OR ').join(ingredients + tools)
+            print(f'{name:>48} {len(result):>8} {scanned * 1000:>10.1f} '
+                  f'{cold * 1000:>10.1f} {warm * 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
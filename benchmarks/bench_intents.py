@@ -0,0 +1,106 @@
+"""This file benchmarks intent recognition against the if/elif chain it replaced."""
+
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intents import UNKNOWN_INTENT, parse_intent  # noqa: E402
+
+# Queries in the styles users type, covering every intent and some that match none
+QUERIES = [
+    'help', 'quit', 'repeat', 'can you repeat that', 'next', 'next step please', 'go back',
+    'go back one step', 'step 3', 'take me to step 12', 'show all steps', 'show all ingredients',
+    'show all tools', 'when do i need the frying pan', 'when do i need the baking tray',
+    'how do i do that', 'how do i fold egg whites', 'how to dice an onion', 'what is a whisk',
+    'what is a roux', 'what ingredients do i need', 'what ingredients do i need for this step',
+    'what tools do i need', 'how long do i bake it', 'how long', 'what temperature',
+    'what temperature should the oven be', 'convert units', 'please convert units',
+    'translate portion size', 'translate portion size for 4 people', 'thanks',
+    'this looks delicious', 'is this vegetarian', 'helpful', 'quit now',
+]
+
+
+def legacy_parse_intent(question):
+    """
+    Recognizes the intent of a query the way the if/elif chain in Bot.answer_queries did.
+    """
+    if question == 'help':
+        return 'help', {}
+    elif question == 'quit':
+        return 'quit', {}
+    elif 'repeat' in question:
+        return 'repeat', {}
+    elif 'next' in question:
+        return 'next', {}
+    elif 'go back' in question:
+        return 'previous', {}
+    elif re.search('step [\\d]+', question):
+        i = re.search(
+            'step [\\d]+', question).group().split()[-1]
+        return 'step', {'number': i}
+    elif 'show all steps' in question:
+        return 'steps', {}
+    elif 'show all ingredients' in question:
+        return 'ingredients', {}
+    elif 'show all tools' in question:
+        return 'tools', {}
+    elif re.search('when do i need the [\\w|\\s]+', question):
+        tool = re.search(
+            'when do i need the [\\w|\\s]+', question).group()[19:]
+        return 'tool_step', {'tool': tool}
+    elif re.search('how do i do that', question):
+        return 'vague_how_to', {}
+    elif re.search('how do i', question) or re.search('how to', question):
+        return 'how_to', {}
+    elif re.search('what is a', question):
+        return 'what_is', {}
+    elif 'what ingredients do i need' in question:
+        return 'step_ingredients', {}
+    elif 'what tools do i need' in question:
+        return 'step_tools', {}
+    elif 'how long' in question:
+        return 'time', {}
+    elif 'what temperature' in question:
+        return 'temperature', {}
+    elif 'convert units' in question:
+        return 'convert_units', {}
+    elif 'translate portion size' in question:
+        return 'translate_portion_size', {}
+    else:
+        return UNKNOWN_INTENT, {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--queries', type=int, default=100000,
+                        help='Number of queries to sample')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of timing runs to take the best of')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed for sampling queries')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    queries = [rng.choice(QUERIES) for _ in range(args.queries)]
+    for query in QUERIES:
+        intent = parse_intent(query)
+        if (intent.name, intent.args) != legacy_parse_intent(query):
+            sys.exit(f'Intents differ for {query!r}')
+
+    previous = min(timeit.repeat(lambda: [legacy_parse_intent(q) for q in queries],
+                                 number=1, repeat=args.repeat))
+    current = min(timeit.repeat(lambda: [parse_intent(q) for q in queries],
+                                number=1, repeat=args.repeat))
+    print(f'{"":>10} {"total (ms)":>12} {"per query (us)":>16}')
+    for name, elapsed in [('previous', previous), ('current', current)]:
+        print(f'{name:>10} {elapsed * 1000:>12.1f} {elapsed / len(queries) * 1e6:>16.2f}')
+    print(f'Speedup: {previous / current:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
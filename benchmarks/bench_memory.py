@@ -0,0 +1,73 @@
+"""This file benchmarks the memory held by parsed recipes loaded into memory."""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsed_recipe import ParsedRecipe  # noqa: E402
+
+
+def read_records(paths):
+    """
+    Reads parsed recipes as written by bulk.py, skipping recipes that failed to extract.
+    """
+    records = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    if 'error' not in record:
+                        records.append(record)
+    return records
+
+
+def measure(load, records):
+    """
+    Measures the bytes allocated and kept alive by loading records.
+
+    Args:
+        load: Function from a record to the object kept in memory.
+        records: Parsed recipes as dictionaries.
+
+    Returns:
+        Tuple of loaded objects and bytes they hold.
+    """
+    gc.collect()
+    tracemalloc.start()
+    loaded = [load(record) for record in records]
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return loaded, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('inputs', nargs='+',
+                        help='JSONL files with parsed recipes, as written by bulk.py')
+    args = parser.parse_args()
+
+    records = read_records(args.inputs)
+    if not records:
+        sys.exit('No parsed recipes found')
+    lines = [json.dumps(record) for record in records]
+
+    # Decoded JSON is the plain dictionary-and-list layout for comparison
+    _, dict_size = measure(json.loads, lines)
+    _, recipe_size = measure(
+        lambda line: ParsedRecipe.from_dict(json.loads(line)), lines)
+
+    print(f'{len(records)} recipes')
+    print(f'{"representation":>16} {"total (KB)":>12} {"bytes/recipe":>14}')
+    for name, size in [('decoded JSON', dict_size), ('ParsedRecipe', recipe_size)]:
+        print(f'{name:>16} {size / 1024:>12.1f} {size / len(records):>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
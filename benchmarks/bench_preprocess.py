@@ -0,0 +1,69 @@
+"""This file benchmarks preprocess against its previous implementation."""
+
+from unicodedata import numeric
+import argparse
+import os
+import re
+import sys
+import timeit
+
+import ftfy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract import preprocess  # noqa: E402
+
+# Instruction blocks in the styles found on TheMealDB, with and without
+# vulgar fractions and irregular whitespace
+INSTRUCTIONS = [
+    'Preheat the oven to 180C/160C fan/gas 4.\r\nMix the flour and sugar in a large bowl.  Add the eggs one at a time.',
+    'Add ½ tsp salt and ¼ cup of milk, then whisk for 2 mins.\r\n\r\nPour into the tin and bake for 25 mins.',
+    'Heat the oil in a pan over medium heat. Fry the onion for 5 mins until soft.\n\tAdd the garlic and cook for 1 min more.',
+    'Stir in ⅓ cup stock and ¾ tbsp of paprika. Simmer for 10 mins.   Season to taste and serve.',
+]
+
+
+def legacy_preprocess(t):
+    """
+    preprocess as it was before it used a translation table and skipped clean ASCII text.
+    """
+    VULGAR_FRACTIONS = ['¼', '½', '¾', '⅐', '⅑', '⅒', '⅓', '⅔',
+                        '⅕', '⅖', '⅗', '⅘', '⅙', '⅚', '⅛', '⅜', '⅝', '⅞', '⅟', '↉']
+    t = ftfy.fix_text(t)
+    for frac in VULGAR_FRACTIONS:
+        while re.search(frac, t):
+            m = re.search(frac, t).group()
+            converted = str(round(numeric(m), 2))
+            t = t.replace(m, converted)
+
+    return re.sub('\s+', ' ', t)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 10000],
+                        help='Numbers of instruction blocks to concatenate into a corpus')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of timing runs to take the best of')
+    args = parser.parse_args()
+
+    corpora = [('mixed', INSTRUCTIONS),
+               ('ascii', [i for i in INSTRUCTIONS if i.isascii()])]
+    print(f'{"corpus":>8} {"blocks":>8} {"previous (ms)":>15} {"current (ms)":>15} {"speedup":>10}')
+    for corpus_name, blocks in corpora:
+        for size in args.sizes:
+            corpus = ' '.join(blocks[i % len(blocks)] for i in range(size))
+            if preprocess(corpus) != legacy_preprocess(corpus):
+                sys.exit(f'Outputs differ for the {corpus_name} corpus of {size} blocks')
+
+            number = max(1, 1000 // size)
+            previous = min(timeit.repeat(lambda: legacy_preprocess(corpus),
+                                         number=number, repeat=args.repeat)) / number
+            current = min(timeit.repeat(lambda: preprocess(corpus),
+                                        number=number, repeat=args.repeat)) / number
+            print(f'{corpus_name:>8} {size:>8} {previous * 1000:>15.3f} '
+                  f'{current * 1000:>15.3f} {previous / current:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""This file benchmarks extract_temperature_parameters against its previous implementation."""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract import extract_temperature_parameters  # noqa: E402
+
+# Fragments of steps with temperatures in every recognized format except
+# '200°C/400°F/Gas Mark 6', which the previous implementation fails on
+FRAGMENTS = ['Heat oven to 200C/180C fan/gas 6 and line a tin.',
+             'Bake at 190c/fan 170c/gas 5 for 20 mins.',
+             'Heat the oven to 220°C/fan200°C/gas 7.',
+             'Roast at 180C/350F/gas 4 until golden.',
+             'Fry over medium-high heat until the oil reaches 180°C.',
+             'Cook on low heat, then bring to 350°F.',
+             'Stir well and season to taste.']
+
+
+def legacy_extract_temperature_parameters(sentence):
+    """
+    extract_temperature_parameters as it was before it used a single compiled pattern.
+    """
+    HEAT_LEVEL_KEYWORDS = ('low heat', 'medium heat',
+                           'medium-high heat', 'meadium high heat', 'high heat')
+    temperature_parameters = []
+    lower_sentence = sentence.lower()
+
+    for keyword in HEAT_LEVEL_KEYWORDS:
+        if keyword in lower_sentence:
+            temperature_parameters.append(keyword)
+
+    while re.search('\d+c/\d+c fan/gas \d+', lower_sentence):
+        m = re.search('\d+c/\d+c fan/gas \d+', lower_sentence).group()
+        m_list = m.split('/')
+        t, f, g = m_list[0].replace(
+            'c', '°C'), m_list[1].replace('c', '°C'), m_list[2]
+        param = ' or '.join((t, f, g))
+        temperature_parameters.append(param)
+        lower_sentence = lower_sentence.replace(m, '')
+        start_index = sentence.lower().index(m)
+        end_index = start_index + len(m)
+        sentence = sentence[:start_index] + param + sentence[end_index:]
+    while re.search('\d+c\/fan \d+c\/gas \d+', lower_sentence):
+        m = re.search('\d+c\/fan \d+c\/gas \d+', lower_sentence).group()
+        m_list = m.split('/')
+        t, f, g = m_list[0].replace(
+            'c', '°C'), m_list[1][4:].replace('c', '°C') + ' fan', m_list[2]
+        param = ' or '.join((t, f, g))
+        temperature_parameters.append(param)
+        lower_sentence = lower_sentence.replace(m, '')
+        start_index = sentence.lower().index(m)
+        end_index = start_index + len(m)
+        sentence = sentence[:start_index] + param + sentence[end_index:]
+    while re.search('\d+°c\/fan\d+°c\/gas \d+', lower_sentence):
+        m = re.search('\d+°c\/fan\d+°c\/gas \d+', lower_sentence).group()
+        m_list = m.replace('c', 'C').split('/')
+        t, f, g = m_list[0], m_list[1][3:] + ' fan', m_list[2]
+        param = ' or '.join((t, f, g))
+        temperature_parameters.append(param)
+        lower_sentence = lower_sentence.replace(m, '')
+        start_index = sentence.lower().index(m)
+        end_index = start_index + len(m)
+        sentence = sentence[:start_index] + param + sentence[end_index:]
+    while re.search('\d+c\/\d+f\/gas \d+', lower_sentence):
+        m = re.search('\d+c\/\d+f\/gas \d+', lower_sentence).group()
+        m_list = m.split('/')
+        t, g = m_list[0].replace('c', '°C'), m_list[2]
+        param = ' or '.join((t, g))
+        temperature_parameters.append(param)
+        lower_sentence = lower_sentence.replace(m, '')
+        start_index = sentence.lower().index(m)
+        end_index = start_index + len(m)
+        sentence = sentence[:start_index] + param + sentence[end_index:]
+    while re.search('\d+°c\/\d+°f\/gas mark \d+', lower_sentence):
+        m = re.search('\d+°c\/\d+°f\/gas mark \d+', lower_sentence).group()
+        m_list = m.split('/')
+        t, g = m_list[0].replace('c', 'C'), m_list[2].replace('mark ', '')
+        param = ' or '.join((t, g))
+        temperature_parameters.append(param)
+        lower_sentence = lower_sentence.replace(m, '')
+        start_index, end_index = sentence.lower().index(
+            m), start_index + len(m)
+        sentence = sentence[:start_index] + param + sentence[end_index:]
+    while re.search('\d+°c', lower_sentence):
+        m = re.search('\d+°c', lower_sentence).group()
+        temperature_parameters.append(m.replace('c', 'C'))
+        lower_sentence = lower_sentence.replace(m, '')
+    while re.search('\d+°f', lower_sentence):
+        m = re.search('\d+°f', lower_sentence).group()
+        temperature_parameters.append(m.replace('f', 'F'))
+        lower_sentence = lower_sentence.replace(m, '')
+
+    return temperature_parameters, sentence
+
+
+def make_step(n):
+    """
+    Makes a step with n sentences cycling through FRAGMENTS, with temperatures varied so none repeat.
+    """
+    sentences = []
+    for i in range(n):
+        fragment = FRAGMENTS[i % len(FRAGMENTS)]
+        sentences.append(re.sub(r'\d+', lambda m: str(int(m.group()) + i), fragment))
+    return ' '.join(sentences)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help='Numbers of sentences per step to benchmark')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of timing runs to take the best of')
+    args = parser.parse_args()
+
+    print(f'{"sentences":>10} {"previous (ms)":>15} {"current (ms)":>15} {"speedup":>10}')
+    for size in args.sizes:
+        step = make_step(size)
+        if extract_temperature_parameters(step) != legacy_extract_temperature_parameters(step):
+            sys.exit(f'Outputs differ for a step with {size} sentences')
+
+        number = max(1, 1000 // size)
+        previous = min(timeit.repeat(lambda: legacy_extract_temperature_parameters(step),
+                                     number=number, repeat=args.repeat)) / number
+        current = min(timeit.repeat(lambda: extract_temperature_parameters(step),
+                                    number=number, repeat=args.repeat)) / number
+        print(f'{size:>10} {previous * 1000:>15.3f} {current * 1000:>15.3f} {previous / current:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
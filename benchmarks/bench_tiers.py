@@ -0,0 +1,84 @@
+"""This file compares the accuracy and throughput of the extraction tiers.
+
+Each tier splits the instructions of the fixture recipes into steps. Its step
+boundaries are compared against those of the 'full' tier, which tags every
+sentence with the whole pipeline.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from bench_extract import DEFAULT_FIXTURE, read_fixture  # noqa: E402
+from extract import EXTRACTION_TIERS, extract, preprocess, segment_instructions  # noqa: E402
+from model import get_nlp  # noqa: E402
+
+
+def get_boundaries(raw_steps_list):
+    """
+    Gets where steps start, as the sentence each step starts at.
+
+    Args:
+        raw_steps_list: List with the raw steps of each instructions.
+
+    Returns:
+        Set of tuples representing instructions index and sentence index.
+    """
+    boundaries = set()
+    for i, raw_steps in enumerate(raw_steps_list):
+        sentence = 0
+        for raw_step in raw_steps:
+            boundaries.add((i, sentence))
+            sentence += raw_step.count('. ') + 1
+    return boundaries
+
+
+def time_best(f, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = f()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fixture', default=DEFAULT_FIXTURE,
+                        help='JSON file with meals as returned by the API')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of runs per tier, of which the fastest is reported')
+    args = parser.parse_args()
+
+    raw_recipes = read_fixture(args.fixture)
+    instructions_list = [preprocess(r['instructions']) for r in raw_recipes]
+    sentences = sum(len(i.split('. ')) for i in instructions_list)
+    get_nlp()
+
+    reference_steps = segment_instructions(instructions_list, tier='full')
+    reference = get_boundaries(reference_steps)
+    print(f'{len(raw_recipes)} recipes, {sentences} sentences, {len(reference)} steps with the full tier')
+    print(f'{"tier":>8} {"precision":>10} {"recall":>8} {"same steps":>11} '
+          f'{"sentences/s":>12} {"recipes/s":>10}')
+    for tier in EXTRACTION_TIERS:
+        raw_steps_list, segmented = time_best(
+            lambda: segment_instructions(instructions_list, tier=tier), args.repeat)
+        _, extracted = time_best(
+            lambda: [extract(r, tier=tier) for r in raw_recipes], args.repeat)
+
+        boundaries = get_boundaries(raw_steps_list)
+        found = len(boundaries & reference)
+        precision = found / len(boundaries) if boundaries else 1
+        recall = found / len(reference) if reference else 1
+        same = sum(a == b for a, b in zip(raw_steps_list, reference_steps))
+        print(f'{tier:>8} {precision:>10.1%} {recall:>8.1%} {f"{same}/{len(raw_recipes)}":>11} '
+              f'{sentences / segmented:>12.0f} {len(raw_recipes) / extracted:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
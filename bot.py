@@ -1,17 +1,25 @@
-import re
 import urllib.parse
 
 from download import download_recipe_by_name, download_recipe_by_url
 from extract import extract
+from intents import UNKNOWN_INTENT, parse_intent
 from parsed_recipe import ParsedRecipe
 
 
 class Bot:
     """
     Class representing a bot that can answer questions about a recipe. 
+
+    The bot reads the user's input and shows its replies through the given
+    functions, so it can talk to a terminal or to a client of the server.
     """
 
-    def __init__(self):
+    def __init__(self, cache=None, mirror=None, input_fn=input, output_fn=print, search=None):
+        self.cache = cache
+        self.mirror = mirror
+        self.search = search
+        self.input = input_fn
+        self.output = output_fn
         self.history = []
         self.recipe = None
         self.step_index = None
@@ -27,42 +35,103 @@ class Bot:
         """
         Gets recipe source from user.
         """
-        print(
+        self.output(
             'Welcome to your interactive cookbook! How would you like to fetch your recipe from TheMealDB?')
         while True:
-            print('[1] URL to a specific recipe.')
-            print('[2] Search recipe by name.')
-            query_choice = input('> ')
+            self.output('[1] URL to a specific recipe.')
+            self.output('[2] Search recipe by name.')
+            query_choice = self.input('> ')
             if query_choice == '1':
-                print('Got it! Please input the URL to a recipe on TheMealDB.')
-                url = input('> ')
-                raw_recipe = download_recipe_by_url(url)
+                self.output('Got it! Please input the URL to a recipe on TheMealDB.')
+                url = self.input('> ')
+                raw_recipe = self.find_mirrored_recipe_by_url(url)
+                if not raw_recipe:
+                    raw_recipe = download_recipe_by_url(url)
                 if not raw_recipe:
-                    print(
+                    self.output(
                         'Sorry, we ran into a problem when loading the URL. Please try again.')
                     continue
                 self.load_recipe(raw_recipe)
                 break
             if query_choice == '2':
-                print('Got it! Please input the name to a recipe you wish to cook.')
-                name = input('> ')
-                raw_recipe = download_recipe_by_name(name)
+                self.output('Got it! Please input the name to a recipe you wish to cook.')
+                name = self.input('> ')
+                raw_recipe = self.find_mirrored_recipe_by_name(name)
+                if not raw_recipe:
+                    raw_recipe = download_recipe_by_name(name)
                 if not raw_recipe:
-                    print(
+                    self.output(
                         'Sorry, we were unable to find a recipe with your query. Please try again.')
                     continue
                 self.load_recipe(raw_recipe)
                 break
             else:
-                print(
+                self.output(
                     'Sorry, I did not understand that. Please enter either 1 or 2 to indicate your choice.')
 
-        print(f'Thanks! Let\'s start working with \'{self.recipe.name}\'.')
-        print()
+        self.output(f'Thanks! Let\'s start working with \'{self.recipe.name}\'.')
+        self.output()
         self.show_current_step()
-        print()
-        print('What do you wish to do next?')
-        print('Hint: Not sure what to ask? Enter \'help\' to show the supported queries and questions.')
+        self.output()
+        self.output('What do you wish to do next?')
+        self.output('Hint: Not sure what to ask? Enter \'help\' to show the supported queries and questions.')
+
+    def find_mirrored_recipe_by_url(self, url):
+        """
+        Finds the recipe that a lookup URL refers to in the local mirror.
+
+        Args:
+            url: URL to a recipe on TheMealDB.
+
+        Returns:
+            Raw recipe, or an empty dictionary if there is no mirror or the recipe is not mirrored.
+        """
+        if not self.mirror:
+            return {}
+        ids = urllib.parse.parse_qs(urllib.parse.urlparse(url).query).get('i')
+        return self.mirror.get_recipe(ids[0]) if ids else {}
+
+    def find_mirrored_recipe_by_name(self, name):
+        """
+        Finds a recipe by name in the local mirror, letting the user choose between close matches.
+
+        Args:
+            name: Search query for meal.
+
+        Returns:
+            Raw recipe, or an empty dictionary if there is no mirror or no recipe matches.
+        """
+        if not self.mirror:
+            return {}
+        if not self.search:
+            return self.mirror.find_recipe_by_name(name)
+        candidates = self.search.search(name)
+        if not candidates:
+            return {}
+        return self.mirror.get_recipe(self.get_candidate_choice(name, candidates))
+
+    def get_candidate_choice(self, name, candidates):
+        """
+        Gets the recipe the user meant from search results.
+
+        Args:
+            name: Search query for meal.
+            candidates: Search results, best match first.
+
+        Returns:
+            Meal ID of chosen recipe.
+        """
+        if len(candidates) == 1 or candidates[0][1].lower() == name.strip().lower():
+            return candidates[0][0]
+        self.output('Here are the closest matches. Which one would you like to cook?')
+        for i, (_, candidate_name, _) in enumerate(candidates):
+            self.output(f'[{i + 1}] {candidate_name}')
+        while True:
+            choice = self.input('> ')
+            if choice.isdigit() and 1 <= int(choice) <= len(candidates):
+                return candidates[int(choice) - 1][0]
+            self.output(
+                f'Sorry, I did not understand that. Please enter a number between 1 and {len(candidates)}.')
 
     def load_recipe(self, raw_recipe):
         """
@@ -71,116 +140,120 @@ class Bot:
         Args:
             raw_recipe: Raw recipe fetched from API.
         """
-        name, steps, ingredients, tools = extract(raw_recipe)
-        self.recipe = ParsedRecipe(name, steps, ingredients, tools)
+        if self.cache:
+            self.recipe = self.cache.load(raw_recipe)
+        else:
+            name, steps, ingredients, tools = extract(raw_recipe)
+            self.recipe = ParsedRecipe(name, steps, ingredients, tools)
         self.step_index = 0
 
     def answer_queries(self):
         """
         Answers user's queries.
         """
+        handlers = self.get_intent_handlers()
         while True:
-            question = input('> ').lower()
-            if question == 'help':
-                self.show_help()
-            elif question == 'quit':
-                print('Hope your food tastes great! Goodbye.')
+            intent = parse_intent(self.input('> ').lower())
+            if intent.name == 'quit':
+                self.output('Hope your food tastes great! Goodbye.')
                 break
-            elif 'repeat' in question:
-                self.show_current_step()
-            elif 'next' in question:
-                self.show_next_step()
-            elif 'go back' in question:
-                self.show_previous_step()
-            elif re.search('step [\d]+', question):
-                i = re.search(
-                    'step [\d]+', question).group().split()[-1]
-                self.show_step_i(i)
-            elif 'show all steps' in question:
-                self.show_steps()
-            elif 'show all ingredients' in question:
-                self.show_ingredients()
-            elif 'show all tools' in question:
-                self.show_tools()
-            elif re.search('when do i need the [\w|\s]+', question):
-                tool = re.search(
-                    'when do i need the [\w|\s]+', question).group()[19:]
-                self.show_step_for_tool(tool)
-            elif re.search('how do i do that', question):
-                self.show_vague_how_to()
-            elif re.search('how do i', question) or re.search('how to', question):
-                self.show_youtube_search(question)
-            elif re.search('what is a', question):
-                self.show_google_search(question)
-            elif 'what ingredients do i need' in question:
-                self.show_current_step_ingredients()
-            elif 'what tools do i need' in question:
-                self.show_current_step_tools()
-            elif 'how long' in question:
-                self.show_current_step_time_parameters()
-            elif 'what temperature' in question:
-                self.show_current_step_temperature_parameters()
-            elif 'convert units' in question:
-                target_unit = self.get_unit_conversion_choice()
-                self.recipe.convert_units(target_unit)
-                self.show_ingredients()
-            elif 'translate portion size' in question:
-                ratio = self.get_portion_size()
-                self.recipe.translate_portion_size(ratio)
-                self.show_ingredients()
-            else:
-                print('Sorry, I did not understand that.')
+            handlers[intent.name](intent)
+
+    def get_intent_handlers(self):
+        """
+        Gets the handler of each intent other than quitting.
+
+        Returns:
+            Dictionary with mapping from intent name to function that answers a query with the intent.
+        """
+        return {
+            'help': lambda intent: self.show_help(),
+            'repeat': lambda intent: self.show_current_step(),
+            'next': lambda intent: self.show_next_step(),
+            'previous': lambda intent: self.show_previous_step(),
+            'step': lambda intent: self.show_step_i(intent.args['number']),
+            'steps': lambda intent: self.show_steps(),
+            'ingredients': lambda intent: self.show_ingredients(),
+            'tools': lambda intent: self.show_tools(),
+            'tool_step': lambda intent: self.show_step_for_tool(intent.args['tool']),
+            'vague_how_to': lambda intent: self.show_vague_how_to(),
+            'how_to': lambda intent: self.show_youtube_search(intent.text),
+            'what_is': lambda intent: self.show_google_search(intent.text),
+            'step_ingredients': lambda intent: self.show_current_step_ingredients(),
+            'step_tools': lambda intent: self.show_current_step_tools(),
+            'time': lambda intent: self.show_current_step_time_parameters(),
+            'temperature': lambda intent: self.show_current_step_temperature_parameters(),
+            'convert_units': lambda intent: self.convert_units(),
+            'translate_portion_size': lambda intent: self.translate_portion_size(),
+            UNKNOWN_INTENT: lambda intent: self.output('Sorry, I did not understand that.')
+        }
+
+    def convert_units(self):
+        """
+        Converts the units of the recipe to the unit chosen by the user.
+        """
+        target_unit = self.get_unit_conversion_choice()
+        self.recipe = self.recipe.convert_units(target_unit)
+        self.show_ingredients()
+
+    def translate_portion_size(self):
+        """
+        Translates the portion size of the recipe by the ratio chosen by the user.
+        """
+        ratio = self.get_portion_size()
+        self.recipe = self.recipe.translate_portion_size(ratio)
+        self.show_ingredients()
 
     def show_help(self):
         """
         Displays valid queries that the bot can understand.
         """
-        print('Here are the queries and questions I can answer:')
-        print('Tip: For convenience, I can detect the commands in lowercase and without punctuation too!')
-        print()
-
-        print('Basics:')
-        print('- \'Help\': Display the supported queries and questions')
-        print('- \'Quit\': Exit the chatbot')
-        print()
-
-        print('Navigation:')
-        print('- \'Repeat\': Show the current step')
-        print('- \'Next\': Show the next step')
-        print('- \'Go back\': Show the previous step')
-        print('- \'Step <STEP_NUMBER>\': Show a specific step')
-        print()
-
-        print('Questions about the recipe:')
-        print('- \'Show all steps\': Show all steps of the recipe')
-        print('- \'Show all ingredients\': Show the ingredients needed for the recipe')
-        print('- \'Show all tools\': Show the tools needed for the recipe')
-        print(
+        self.output('Here are the queries and questions I can answer:')
+        self.output('Tip: For convenience, I can detect the commands in lowercase and without punctuation too!')
+        self.output()
+
+        self.output('Basics:')
+        self.output('- \'Help\': Display the supported queries and questions')
+        self.output('- \'Quit\': Exit the chatbot')
+        self.output()
+
+        self.output('Navigation:')
+        self.output('- \'Repeat\': Show the current step')
+        self.output('- \'Next\': Show the next step')
+        self.output('- \'Go back\': Show the previous step')
+        self.output('- \'Step <STEP_NUMBER>\': Show a specific step')
+        self.output()
+
+        self.output('Questions about the recipe:')
+        self.output('- \'Show all steps\': Show all steps of the recipe')
+        self.output('- \'Show all ingredients\': Show the ingredients needed for the recipe')
+        self.output('- \'Show all tools\': Show the tools needed for the recipe')
+        self.output(
             '- \'When do I need the <TOOL>?\': Show the step number a tool is first used in')
-        print()
-
-        print('Questions about the current step:')
-        print('- \'How do I do that?\': Ask a question on a previously mentioned task')
-        print('- \'What is a <INGREDIENT/TOOL/UTENSIL>\': Ask a question on an ingredient/tool/utensil')
-        print('- \'How do I <TECHNIQUE>\': Ask a question on a technique')
-        print('- \'What ingredients do I need?\': Ask about the ingredients needed for this step')
-        print('- \'What tools do I need?\': Ask about the tools needed for this step')
-        print('- \'How long?\': Ask about the timings for this step')
-        print('- \'What temperature?\': Ask about the temperature settings for this step')
-        print()
-
-        print('Transform recipe:')
-        print(
+        self.output()
+
+        self.output('Questions about the current step:')
+        self.output('- \'How do I do that?\': Ask a question on a previously mentioned task')
+        self.output('- \'What is a <INGREDIENT/TOOL/UTENSIL>\': Ask a question on an ingredient/tool/utensil')
+        self.output('- \'How do I <TECHNIQUE>\': Ask a question on a technique')
+        self.output('- \'What ingredients do I need?\': Ask about the ingredients needed for this step')
+        self.output('- \'What tools do I need?\': Ask about the tools needed for this step')
+        self.output('- \'How long?\': Ask about the timings for this step')
+        self.output('- \'What temperature?\': Ask about the temperature settings for this step')
+        self.output()
+
+        self.output('Transform recipe:')
+        self.output(
             '- \'Convert units\': Convert the units from imperial to metric, or vice versa')
-        print(
+        self.output(
             '- \'Translate portion size\': Increase/decrease the portion sizes by a ratio')
 
     def show_steps(self):
         """
         Displays all steps for this recipe.
         """
-        print('Here are all of the steps in this recipe:')
-        print(self.recipe)
+        self.output('Here are all of the steps in this recipe:')
+        self.output(self.recipe)
 
     def show_current_step(self):
         """
@@ -189,16 +262,16 @@ class Bot:
         try:
             current_step = self.recipe.get_step(self.step_index)
         except ValueError:
-            print('Recipe has not been loaded yet.')
+            self.output('Recipe has not been loaded yet.')
         else:
-            print(f"Step {self.step_index + 1}: {current_step}")
+            self.output(f"Step {self.step_index + 1}: {current_step}")
 
     def show_next_step(self):
         """
         Displays the next step.
         """
         if self.step_index >= self.recipe.get_number_of_steps() - 1:
-            print('We are already at the last step of the recipe.')
+            self.output('We are already at the last step of the recipe.')
         else:
             self.step_index += 1
             self.show_current_step()
@@ -208,7 +281,7 @@ class Bot:
         Displays the previous step.
         """
         if self.step_index <= 0:
-            print('We are already at the first step of the recipe.')
+            self.output('We are already at the first step of the recipe.')
         else:
             self.step_index -= 1
             self.show_current_step()
@@ -223,7 +296,7 @@ class Bot:
         try:
             self.recipe.get_step(int(i) - 1)
         except IndexError:
-            print(
+            self.output(
                 f'This is an invalid step number. Please enter a step number between 1 and {self.recipe.get_number_of_steps()}')
         else:
             self.step_index = int(i) - 1
@@ -233,14 +306,14 @@ class Bot:
         """
         Displays all ingredients needed for this recipe.
         """
-        print('Here are all of the ingredients used in this recipe:')
+        self.output('Here are all of the ingredients used in this recipe:')
         self.show_list_in_numbered_list(self.recipe.get_ingredients())
 
     def show_tools(self):
         """
         Displays all tools needed for this recipe.
         """
-        print('Here are all of the tools used in this recipe:')
+        self.output('Here are all of the tools used in this recipe:')
         self.show_list_in_numbered_list(list(self.recipe.get_tools().keys()))
 
     def show_step_for_tool(self, query):
@@ -252,10 +325,10 @@ class Bot:
         """
         for tool in self.recipe.get_tools().keys():
             if query in tool:
-                print(
+                self.output(
                     f'{tool.capitalize()} is/are used in step {self.recipe.get_tools()[tool] + 1}.')
                 return
-        print('Sorry, I cannot find the tool you are looking for in the recipe.')
+        self.output('Sorry, I cannot find the tool you are looking for in the recipe.')
 
     def show_google_search(self, query):
         """
@@ -267,7 +340,7 @@ class Bot:
         base_url = 'https://www.google.com/search?q='
         query_encoded = urllib.parse.quote(query)
         search_url = base_url + query_encoded
-        print(f'Here is a Google search for your question: {search_url}')
+        self.output(f'Here is a Google search for your question: {search_url}')
 
     def show_youtube_search(self, query):
         """
@@ -279,7 +352,7 @@ class Bot:
         base_url = "https://www.youtube.com/results?search_query="
         query_encoded = urllib.parse.quote(query)
         search_url = base_url + query_encoded
-        return print(f'Here is a YouTube search for your question: {search_url}')
+        return self.output(f'Here is a YouTube search for your question: {search_url}')
 
     def show_vague_how_to(self):
         """
@@ -287,7 +360,7 @@ class Bot:
         """
         action = self.recipe.get_step(self.step_index).get_main_action()
         if action:
-            print(
+            self.output(
                 f'Judging from the last step I showed you, are you asking about how to {action}?')
             query = f"How to {action}"
             return self.show_youtube_search(query)
@@ -301,10 +374,10 @@ class Bot:
         step_ingredients = self.recipe.get_step(
             self.step_index).get_ingredients()
         if step_ingredients:
-            print('Here are all of the ingredients used in this step:')
+            self.output('Here are all of the ingredients used in this step:')
             self.show_list_in_numbered_list(step_ingredients)
         else:
-            print('No ingredients are needed for this step.')
+            self.output('No ingredients are needed for this step.')
 
     def show_current_step_tools(self):
         """
@@ -313,10 +386,10 @@ class Bot:
         step_tools = self.recipe.get_step(
             self.step_index).get_tools()
         if step_tools:
-            print('Here are all of the tools used in this step:')
+            self.output('Here are all of the tools used in this step:')
             self.show_list_in_numbered_list(step_tools)
         else:
-            print('No tools are needed for this step.')
+            self.output('No tools are needed for this step.')
 
     def show_current_step_time_parameters(self):
         """
@@ -325,12 +398,12 @@ class Bot:
         time_parameters = self.recipe.get_step(
             self.step_index).get_time_parameters()
         if time_parameters:
-            print('Here are the timings to watch out for:')
+            self.output('Here are the timings to watch out for:')
             for action, parameters in time_parameters.items():
                 parameters_str = ' or '.join(parameters)
-                print(f'- {action.capitalize()} for {parameters_str}')
+                self.output(f'- {action.capitalize()} for {parameters_str}')
         else:
-            print('There are no timings for this step.')
+            self.output('There are no timings for this step.')
 
     def show_current_step_temperature_parameters(self):
         """
@@ -339,58 +412,58 @@ class Bot:
         temperature_parameters = self.recipe.get_step(
             self.step_index).get_temperature_parameters()
         if len(temperature_parameters) == 0:
-            print('There are no temperature parameters for this step.')
+            self.output('There are no temperature parameters for this step.')
         elif len(temperature_parameters) == 1:
-            print(temperature_parameters[0])
+            self.output(temperature_parameters[0])
         else:
-            print('Here are the temperature settings for this step:')
+            self.output('Here are the temperature settings for this step:')
             for parameter in temperature_parameters:
-                print(f'- {parameter}')
+                self.output(f'- {parameter}')
 
     def get_unit_conversion_choice(self):
         """
         Gets target unit from user.
         """
-        print(
+        self.output(
             'Got it! What unit which you like to convert to?')
-        print('[1] Metric')
-        print('[2] Imperial')
+        self.output('[1] Metric')
+        self.output('[2] Imperial')
         while True:
-            query_choice = input('> ')
+            query_choice = self.input('> ')
             if query_choice == '1':
-                print('Okay! Converting to metric units now!')
-                print('...')
+                self.output('Okay! Converting to metric units now!')
+                self.output('...')
                 return 'METRIC'
             if query_choice == '2':
-                print('Okay! Converting to imperial units now!')
-                print('...')
+                self.output('Okay! Converting to imperial units now!')
+                self.output('...')
                 return 'IMPERIAL'
             else:
-                print(
+                self.output(
                     'Sorry, I did not understand that. Please enter either 1 or 2 to indicate your choice.')
 
     def get_portion_size(self):
         """
         Gets portion size ratio from user.
         """
-        print(
+        self.output(
             'Got it! Please input a ratio to translate the portion size by.')
         while True:
-            ratio = input('> ')
+            ratio = self.input('> ')
             if ratio.isnumeric():
-                print(
+                self.output(
                     f'Okay! Translating the ingredients by a ratio of {ratio} now!')
-                print('Note that only ingredients are translated. Cookings times, temperatures, and etc. may need to be adjusted accordingly too.')
-                print('...')
+                self.output('Note that only ingredients are translated. Cookings times, temperatures, and etc. may need to be adjusted accordingly too.')
+                self.output('...')
                 return int(ratio)
             if ratio.replace('.', '').isnumeric():
-                print(
+                self.output(
                     f'Okay! Translating the ingredients by a ratio of {ratio} now!')
-                print('Note that only ingredients are translated. Cookings times, temperatures, and etc. may need to be adjusted accordingly too.')
-                print('...')
+                self.output('Note that only ingredients are translated. Cookings times, temperatures, and etc. may need to be adjusted accordingly too.')
+                self.output('...')
                 return float(ratio)
             else:
-                print(
+                self.output(
                     'Sorry, I did not understand that. Please enter an integer or decimal number greater than 0.')
 
     def show_list_in_numbered_list(self, lst):
@@ -401,4 +474,4 @@ class Bot:
             lst: List of strings to show.
         """
         for i, item in enumerate(lst):
-            print(f'{i + 1}. {item}')
+            self.output(f'{i + 1}. {item}')
@@ -0,0 +1,200 @@
+"""This file provides a command line tool to extract many recipes in parallel."""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from cache import StepCache, get_step_cache_max_bytes
+from crawler import Mirror
+from extract import EXTRACTION_TIERS, extract
+from model import get_nlp
+from parsed_recipe import ParsedRecipe
+
+
+def read_raw_recipes(paths):
+    """
+    Reads raw recipes from local files.
+
+    Args:
+        paths: Paths to JSON files holding a recipe or a list of recipes, or JSONL files holding a recipe per line.
+            Recipes are dictionaries as returned by process_recipe_from_api.
+
+    Yields:
+        Raw recipes, in the order they appear in the files.
+    """
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            if path.endswith('.jsonl'):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+                continue
+
+            data = json.load(f)
+            if isinstance(data, list):
+                yield from data
+            else:
+                yield data
+
+
+# Cache of previously extracted steps in this worker process, if any
+step_cache = None
+
+# Extraction tier of this worker process, or None for the default
+tier = None
+
+
+def init_worker(step_cache_path=None, step_cache_max_bytes=None, extraction_tier=None):
+    """
+    Loads the spaCy model once in each worker process.
+
+    Args:
+        step_cache_path: Path to a step cache to reuse unchanged steps from, if any.
+        step_cache_max_bytes: Size budget of the step cache. Defaults to its share of the database,
+            which is half if the database also holds a recipe cache.
+        extraction_tier: One of EXTRACTION_TIERS to segment steps with, if not the default.
+    """
+    global step_cache, tier
+    get_nlp()
+    if step_cache_path:
+        step_cache = StepCache(step_cache_path, step_cache_max_bytes or get_step_cache_max_bytes(
+            step_cache_path))
+    tier = extraction_tier
+
+
+def extract_recipe(raw_recipe):
+    """
+    Extracts a recipe in a worker process.
+
+    Args:
+        raw_recipe: Raw recipe to extract from.
+
+    Returns:
+        Tuple of worker process ID, seconds spent, and the parsed recipe as a dictionary.
+        The dictionary holds the recipe name and an error message if extraction failed.
+    """
+    start = time.perf_counter()
+    try:
+        name, steps, ingredients, tools = extract(raw_recipe, step_cache, tier)
+        record = ParsedRecipe(name, steps, ingredients, tools).to_dict()
+        if raw_recipe.get('id') is not None:
+            record['id'] = raw_recipe['id']
+    except Exception as e:
+        record = {'name': raw_recipe.get('name'), 'error': repr(e)}
+    return os.getpid(), time.perf_counter() - start, record
+
+
+class WorkerStats:
+    """
+    Class representing the progress of a worker process.
+    """
+
+    def __init__(self):
+        self.recipes = 0
+        self.errors = 0
+        self.busy_time = 0
+
+    def get_throughput(self):
+        return self.recipes / self.busy_time if self.busy_time else 0
+
+
+def extract_all(raw_recipes, output, workers, chunksize=4, progress_every=100, step_cache_path=None, tier=None):
+    """
+    Extracts recipes across a process pool and writes them as JSONL in input order.
+
+    Args:
+        raw_recipes: Iterable of raw recipes.
+        output: Text file to write parsed recipes to.
+        workers: Number of worker processes.
+        chunksize: Number of recipes sent to a worker at a time.
+        progress_every: Number of recipes between progress reports.
+        step_cache_path: Path to a step cache shared by the workers, if any.
+        tier: One of EXTRACTION_TIERS to segment steps with, if not the default.
+
+    Returns:
+        Dictionary with mapping from worker process ID to its stats.
+    """
+    stats = {}
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(step_cache_path, None, tier)) as pool:
+        results = pool.imap(extract_recipe, raw_recipes, chunksize)
+        for i, (pid, elapsed, record) in enumerate(results, 1):
+            output.write(json.dumps(record) + '\n')
+
+            worker_stats = stats.setdefault(pid, WorkerStats())
+            worker_stats.recipes += 1
+            worker_stats.busy_time += elapsed
+            if 'error' in record:
+                worker_stats.errors += 1
+
+            if i % progress_every == 0:
+                rate = i / (time.perf_counter() - start)
+                per_worker = ', '.join(
+                    f'{pid}: {s.recipes}' for pid, s in sorted(stats.items()))
+                print(f'{i} recipes, {rate:.1f} recipes/s ({per_worker})',
+                      file=sys.stderr)
+    return stats
+
+
+def show_stats(stats, elapsed):
+    """
+    Displays the throughput of each worker and of the whole run.
+
+    Args:
+        stats: Dictionary with mapping from worker process ID to its stats.
+        elapsed: Wall time of the run in seconds.
+    """
+    total = sum(s.recipes for s in stats.values())
+    errors = sum(s.errors for s in stats.values())
+    for pid, s in sorted(stats.items()):
+        print(f'Worker {pid}: {s.recipes} recipes, {s.errors} errors, '
+              f'{s.busy_time:.1f}s busy, {s.get_throughput():.2f} recipes/s', file=sys.stderr)
+    rate = total / elapsed if elapsed else 0
+    print(f'Total: {total} recipes, {errors} errors in {elapsed:.1f}s, {rate:.2f} recipes/s',
+          file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('inputs', nargs='*',
+                        help='JSON or JSONL files with raw recipes')
+    parser.add_argument('--mirror',
+                        help='Path to a local mirror of TheMealDB to read raw recipes from instead of files')
+    parser.add_argument('-o', '--output', default='-',
+                        help='JSONL file to write parsed recipes to (default: stdout)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(),
+                        help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--chunksize', type=int, default=4,
+                        help='Number of recipes sent to a worker at a time')
+    parser.add_argument('--progress-every', type=int, default=100,
+                        help='Number of recipes between progress reports')
+    parser.add_argument('--step-cache',
+                        help='Path to a step cache, so recipes extracted before only parse their new or changed steps')
+    parser.add_argument('--tier', choices=EXTRACTION_TIERS,
+                        help='How to find the sentences that start steps, from most accurate to fastest '
+                        '(default: COOKBOOK_EXTRACTION_TIER or tagger)')
+    args = parser.parse_args()
+    if not args.inputs and not args.mirror:
+        parser.error('either inputs or --mirror is required')
+    if args.mirror:
+        raw_recipes = Mirror(args.mirror).iter_recipes()
+    else:
+        raw_recipes = read_raw_recipes(args.inputs)
+
+    output = sys.stdout if args.output == '-' else open(
+        args.output, 'w', encoding='utf-8')
+    start = time.perf_counter()
+    try:
+        stats = extract_all(raw_recipes, output,
+                            args.workers, args.chunksize, args.progress_every, args.step_cache, args.tier)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    show_stats(stats, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""This file provides a persistent cache of parsed recipes."""
+
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from extract import EXTRACTION_TIER, EXTRACTOR_VERSION, extract
+from model import MODEL_NAME, get_model_version
+from parsed_recipe import ParsedRecipe
+from step import Step
+
+CACHE_DIR = os.environ.get('COOKBOOK_CACHE_DIR', os.path.join(
+    os.path.expanduser('~'), '.cache', 'cookbook'))
+
+# Total size of cached recipes and steps kept before the least recently used
+# are evicted. A recipe cache gives half of it to its step cache.
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Seconds between updates of when an entry was last read. Reads of an entry
+# that was read more recently than this do not write at all.
+TOUCH_INTERVAL = 60
+
+
+def get_cache_version():
+    """
+    Gets the version that cached recipes and steps are valid for.
+
+    The extraction tier is not part of it, so recipes extracted with each tier
+    can share a cache. Recipes are keyed by their tier instead.
+
+    Returns:
+        String combining the extractor version with the spaCy model name and version.
+    """
+    return f'{EXTRACTOR_VERSION}/{MODEL_NAME}/{get_model_version()}'
+
+
+def get_recipe_key(raw_recipe, version, tier=None):
+    """
+    Computes the cache key of a raw recipe.
+
+    Args:
+        raw_recipe: Dictionary representing recipe to extract from.
+        version: Version that the cached recipe is valid for.
+        tier: Extraction tier the recipe is extracted with. Defaults to EXTRACTION_TIER.
+
+    Returns:
+        Hex digest of the recipe content, version and tier.
+    """
+    tier = tier or EXTRACTION_TIER
+    content = json.dumps({
+        'name': raw_recipe['name'],
+        'instructions': raw_recipe['instructions'],
+        'ingredients': raw_recipe['ingredients']
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f'{version}/{tier}\n{content}'.encode('utf-8')).hexdigest()
+
+
+def get_step_key(raw_step, ingredients, name, version):
+    """
+    Computes the cache key of a raw step.
+
+    Args:
+        raw_step: Raw step as segmented from the instructions.
+        ingredients: List of ingredients for recipe, which the step's annotations depend on.
+        name: Name of recipe, which tools are matched against.
+        version: Version that the cached step is valid for.
+
+    Returns:
+        Hex digest of the step content and what it depends on.
+    """
+    content = json.dumps({
+        'step': raw_step,
+        'ingredients': [ingredient.name for ingredient in ingredients],
+        'name': name
+    }, ensure_ascii=False)
+    return hashlib.sha256(f'{version}\n{content}'.encode('utf-8')).hexdigest()
+
+
+@contextmanager
+def connect(path, write=True):
+    """
+    Opens a connection with a transaction that commits on success and is always closed.
+
+    Args:
+        path: Path to the database.
+        write: Whether to take the write lock when the transaction begins.
+            Read transactions never wait for each other or for a writer.
+    """
+    connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        connection.execute('BEGIN IMMEDIATE' if write else 'BEGIN')
+        yield connection
+        connection.execute('COMMIT')
+    except BaseException:
+        if connection.in_transaction:
+            connection.execute('ROLLBACK')
+        raise
+    finally:
+        connection.close()
+
+
+def touch(path, table, keys, last_accesses):
+    """
+    Records that entries were read, unless they were read within TOUCH_INTERVAL.
+
+    Args:
+        path: Path to the database.
+        table: Table of the entries.
+        keys: Keys of the entries read.
+        last_accesses: When each entry was last read.
+    """
+    now = time.time()
+    stale = [key for key, last_access in zip(keys, last_accesses)
+             if now - last_access > TOUCH_INTERVAL]
+    if not stale:
+        return
+    with connect(path) as connection:
+        connection.execute(f'UPDATE {table} SET last_access = ? WHERE key IN ({", ".join("?" * len(stale))})',
+                           [now] + stale)
+
+
+def get_step_cache_max_bytes(path, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Gets the size budget of a step cache, which is half of max_bytes if it shares a database with a recipe cache.
+
+    Args:
+        path: Path to the database of the step cache.
+        max_bytes: Total size budget of the database.
+
+    Returns:
+        Size budget of the steps.
+    """
+    if not os.path.exists(path):
+        return max_bytes
+    connection = sqlite3.connect(path, timeout=30)
+    try:
+        shared = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipes'").fetchone()
+    finally:
+        connection.close()
+    return max_bytes // 2 if shared else max_bytes
+
+
+def evict(connection, table, max_bytes):
+    """
+    Evicts the least recently used entries of a table until their total size fits.
+    """
+    connection.execute(f'DELETE FROM {table} WHERE key IN ('
+                       f'SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_access DESC) AS total '
+                       f'FROM {table}) WHERE total > ?)', (max_bytes,))
+
+
+def init_database(path):
+    """
+    Creates the directory of a cache database and switches it to write-ahead logging.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(path, timeout=30)
+    try:
+        # Write-ahead logging lets readers proceed while another process writes
+        connection.execute('PRAGMA journal_mode=WAL')
+    finally:
+        connection.close()
+
+
+class StepCache:
+    """
+    Class representing an on-disk cache of step annotations keyed by raw step content.
+
+    When a recipe is edited, its unchanged steps are found here and only new or
+    changed steps are parsed again. Annotations only depend on the step text,
+    so steps are shared by every extraction tier.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR, 'recipes.sqlite3'), max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = get_cache_version()
+
+        init_database(path)
+        with self.connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS steps ('
+                               'key TEXT PRIMARY KEY, version TEXT NOT NULL, data TEXT NOT NULL, '
+                               'size INTEGER NOT NULL, last_access REAL NOT NULL)')
+            connection.execute(
+                'DELETE FROM steps WHERE version != ?', (self.version,))
+
+    def connect(self, write=True):
+        return connect(self.path, write)
+
+    def get_steps(self, raw_steps, ingredients, name):
+        """
+        Gets the cached annotations of raw steps.
+
+        Args:
+            raw_steps: Raw steps of a recipe.
+            ingredients: List of ingredients for recipe.
+            name: Name of recipe.
+
+        Returns:
+            List with the cached step for each raw step, or None where it is not cached.
+        """
+        keys = [get_step_key(raw_step, ingredients, name, self.version)
+                for raw_step in raw_steps]
+        with self.connect(write=False) as connection:
+            placeholders = ', '.join('?' * len(keys))
+            rows = {key: (data, last_access) for key, data, last_access in connection.execute(
+                f'SELECT key, data, last_access FROM steps WHERE key IN ({placeholders})', keys)}
+        touch(self.path, 'steps', list(rows),
+              [last_access for _, last_access in rows.values()])
+        return [Step.from_dict(json.loads(rows[key][0]), ingredients) if key in rows else None
+                for key in keys]
+
+    def put_steps(self, raw_steps, steps, ingredients, name):
+        """
+        Stores the annotations of raw steps, evicting the least recently used steps if the cache is full.
+
+        Args:
+            raw_steps: Raw steps of a recipe.
+            steps: Step extracted from each raw step.
+            ingredients: List of ingredients for recipe.
+            name: Name of recipe.
+        """
+        now = time.time()
+        rows = []
+        for raw_step, step in zip(raw_steps, steps):
+            data = json.dumps(step.to_dict(ingredients))
+            rows.append((get_step_key(raw_step, ingredients, name, self.version),
+                         self.version, data, len(data), now))
+        with self.connect() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO steps VALUES (?, ?, ?, ?, ?)', rows)
+            evict(connection, 'steps', self.max_bytes)
+
+
+class RecipeCache:
+    """
+    Class representing an on-disk cache of parsed recipes keyed by recipe content.
+
+    The cache is stored in SQLite, so it can be shared by several processes.
+    Recipes that miss are extracted with the step cache in the same database,
+    so edited recipes only parse their changed steps. Recipes and steps each
+    get half of max_bytes.
+    """
+
+    def __init__(self, path=os.path.join(CACHE_DIR, 'recipes.sqlite3'), max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes - max_bytes // 2
+        self.version = get_cache_version()
+        self.step_cache = StepCache(path, max_bytes // 2)
+
+        with self.connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS recipes ('
+                               'key TEXT PRIMARY KEY, version TEXT NOT NULL, data TEXT NOT NULL, '
+                               'size INTEGER NOT NULL, last_access REAL NOT NULL)')
+            # Entries from other extractor or model versions can never be hit again
+            connection.execute(
+                'DELETE FROM recipes WHERE version != ?', (self.version,))
+
+    def connect(self, write=True):
+        return connect(self.path, write)
+
+    def get(self, key):
+        """
+        Gets a parsed recipe from the cache.
+
+        Args:
+            key: Cache key of the recipe.
+
+        Returns:
+            Parsed recipe, or None if it is not cached.
+        """
+        with self.connect(write=False) as connection:
+            row = connection.execute(
+                'SELECT data, last_access FROM recipes WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        touch(self.path, 'recipes', [key], [row[1]])
+        return ParsedRecipe.from_dict(json.loads(row[0]))
+
+    def put(self, key, recipe):
+        """
+        Stores a parsed recipe in the cache, evicting the least recently used recipes if the cache is full.
+
+        Args:
+            key: Cache key of the recipe.
+            recipe: Parsed recipe to store.
+        """
+        data = json.dumps(recipe.to_dict())
+        with self.connect() as connection:
+            connection.execute('INSERT OR REPLACE INTO recipes VALUES (?, ?, ?, ?, ?)',
+                               (key, self.version, data, len(data), time.time()))
+            evict(connection, 'recipes', self.max_bytes)
+
+    def load(self, raw_recipe, tier=None):
+        """
+        Gets a parsed recipe from the cache, extracting and storing it on a miss.
+
+        Args:
+            raw_recipe: Dictionary representing recipe to extract from.
+            tier: One of EXTRACTION_TIERS to segment steps with. Defaults to EXTRACTION_TIER.
+
+        Returns:
+            Parsed recipe.
+        """
+        key = get_recipe_key(raw_recipe, self.version, tier)
+        recipe = self.get(key)
+        if recipe is None:
+            name, steps, ingredients, tools = extract(
+                raw_recipe, self.step_cache, tier)
+            recipe = ParsedRecipe(name, steps, ingredients, tools)
+            self.put(key, recipe)
+        return recipe
@@ -0,0 +1,61 @@
+"""This file checks that starting the chatbot stays within its time and memory budget."""
+
+import argparse
+import subprocess
+import sys
+
+# Budget for importing the chatbot's entry point, before any recipe is parsed
+IMPORT_TIME_BUDGET_SECONDS = 1.0
+RSS_BUDGET_MB = 100
+
+MEASURE_SCRIPT = '''
+import resource, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(elapsed, max_rss, 'spacy' in sys.modules)
+'''
+
+
+def measure_startup():
+    """
+    Measures importing main.py, with everything the chatbot loads on startup, in a fresh interpreter.
+
+    Returns:
+        Tuple of import time in seconds, peak RSS in MB, and whether spaCy was imported.
+    """
+    output = subprocess.run([sys.executable, '-c', MEASURE_SCRIPT],
+                            capture_output=True, text=True, check=True).stdout
+    elapsed, max_rss, spacy_imported = output.split()
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    rss_mb = int(max_rss) / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return float(elapsed), rss_mb, spacy_imported == 'True'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--time-budget', type=float,
+                        default=IMPORT_TIME_BUDGET_SECONDS, help='Import time budget in seconds')
+    parser.add_argument('--rss-budget', type=float,
+                        default=RSS_BUDGET_MB, help='Peak RSS budget in MB')
+    args = parser.parse_args()
+
+    elapsed, rss_mb, spacy_imported = measure_startup()
+    print(f'Import time: {elapsed:.3f}s (budget {args.time_budget:.3f}s)')
+    print(f'Peak RSS: {rss_mb:.1f} MB (budget {args.rss_budget:.1f} MB)')
+
+    failures = []
+    if elapsed > args.time_budget:
+        failures.append('import time is over budget')
+    if rss_mb > args.rss_budget:
+        failures.append('peak RSS is over budget')
+    if spacy_imported:
+        failures.append('spaCy is imported at startup')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""This file provides a columnar store of ingredient quantities across many recipes."""
+
+import numpy as np
+
+from ingredient import Ingredient
+from units import IMPERIAL_TO_METRIC, METRIC_TO_IMPERIAL
+
+# Units known to every store, including the units that conversions produce
+UNITS = list(dict.fromkeys(
+    ['', Ingredient.COUNTABLE_MEASUREMENT, 'cup'] +
+    list(IMPERIAL_TO_METRIC) + [unit for _, unit in IMPERIAL_TO_METRIC.values()] +
+    list(METRIC_TO_IMPERIAL) + [unit for _, unit in METRIC_TO_IMPERIAL.values()]))
+
+
+def get_conversion_table(units, conversions):
+    """
+    Builds lookup tables that convert every unit code at once.
+
+    Args:
+        units: List of units, indexed by unit code.
+        conversions: Mapping from unit to tuple of ratio and converted unit, like IMPERIAL_TO_METRIC.
+
+    Returns:
+        Tuple of arrays indexed by unit code: whether the unit is converted, the ratio, and the converted unit code.
+    """
+    codes = {unit: code for code, unit in enumerate(units)}
+    convertible = np.zeros(len(units), dtype=bool)
+    ratios = np.ones(len(units))
+    converted_codes = np.arange(len(units), dtype=np.int32)
+    for unit, (ratio, converted_unit) in conversions.items():
+        code = codes[unit]
+        convertible[code] = True
+        ratios[code] = ratio
+        converted_codes[code] = codes[converted_unit]
+    return convertible, ratios, converted_codes
+
+
+def round_quantities(quantities):
+    """
+    Rounds quantities to 2 decimal places the way round does.
+
+    np.round scales by 100 before rounding, which can tip values that are just
+    below a half-way point, like 551.155, the other way. Those few values are
+    rounded again one at a time.
+
+    Args:
+        quantities: Array of quantities.
+
+    Returns:
+        Array of rounded quantities.
+    """
+    rounded = np.round(quantities, 2)
+    scaled = quantities * 100
+    near_half = np.flatnonzero(
+        np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    rounded[near_half] = [round(q, 2) for q in quantities[near_half].tolist()]
+    return rounded
+
+
+class IngredientColumns:
+    """
+    Class representing the ingredient quantities of many recipes as columns.
+
+    Each ingredient is a row across the quantity, unit code and recipe ID arrays,
+    with rows grouped by recipe, so conversions and scaling run over the whole
+    column at once. Transformations return new columns and share the names,
+    units and recipe IDs.
+    """
+
+    def __init__(self, names, quantities, unit_codes, recipe_ids, units):
+        self.names = names
+        self.quantities = quantities
+        self.unit_codes = unit_codes
+        self.recipe_ids = recipe_ids
+        self.units = units
+
+    @staticmethod
+    def from_recipes(recipes):
+        """
+        Creates columns from parsed recipes.
+
+        Args:
+            recipes: Iterable of parsed recipes. A recipe's ID is its position in the iterable.
+        """
+        units = list(UNITS)
+        codes = {unit: code for code, unit in enumerate(units)}
+        names, quantities, unit_codes, recipe_ids = [], [], [], []
+        for recipe_id, recipe in enumerate(recipes):
+            for ingredient in recipe.get_ingredients():
+                if ingredient.measurement not in codes:
+                    codes[ingredient.measurement] = len(units)
+                    units.append(ingredient.measurement)
+                names.append(ingredient.name)
+                quantities.append(ingredient.quantity)
+                unit_codes.append(codes[ingredient.measurement])
+                recipe_ids.append(recipe_id)
+        return IngredientColumns(names, np.array(quantities, dtype=np.float64),
+                                 np.array(unit_codes, dtype=np.int32),
+                                 np.array(recipe_ids, dtype=np.int32), units)
+
+    def get_number_of_recipes(self):
+        return int(self.recipe_ids[-1]) + 1 if len(self.recipe_ids) else 0
+
+    def get_recipe_ingredients(self, recipe_id):
+        """
+        Gets the ingredient quantities of a recipe.
+
+        Args:
+            recipe_id: ID of the recipe.
+
+        Returns:
+            List of tuples representing ingredient name, quantity and measurement.
+        """
+        start, end = np.searchsorted(self.recipe_ids, [recipe_id, recipe_id + 1])
+        return [(self.names[i], float(self.quantities[i]), self.units[self.unit_codes[i]])
+                for i in range(start, end)]
+
+    def convert_units(self, target_unit):
+        """
+        Converts the units of every ingredient to the target unit.
+
+        Args:
+            target_unit: Target unit. Valid units are 'METRIC' and 'IMPERIAL'.
+
+        Returns:
+            New columns with converted units, or these columns if the target unit is invalid.
+        """
+        if target_unit == 'METRIC':
+            conversions = IMPERIAL_TO_METRIC
+        elif target_unit == 'IMPERIAL':
+            conversions = METRIC_TO_IMPERIAL
+        else:
+            return self
+        convertible, ratios, converted_codes = get_conversion_table(
+            self.units, conversions)
+
+        # Countable ingredients and ingredients without quantity have units
+        # outside the conversion tables, so they are left as they are
+        converted = convertible[self.unit_codes] & (
+            self.quantities != Ingredient.NO_QUANTITY)
+        quantities = np.where(converted, round_quantities(
+            self.quantities * ratios[self.unit_codes]), self.quantities)
+        unit_codes = np.where(
+            converted, converted_codes[self.unit_codes], self.unit_codes)
+
+        if target_unit == 'IMPERIAL':
+            cups, cup = self.units.index('cups'), self.units.index('cup')
+            unit_codes[converted & (unit_codes == cups) & (quantities == 1)] = cup
+        return IngredientColumns(self.names, quantities, unit_codes.astype(np.int32),
+                                 self.recipe_ids, self.units)
+
+    def translate_portion_size(self, ratio):
+        """
+        Translates the quantity of every ingredient by a ratio.
+
+        Args:
+            ratio: Ratio to translate by.
+
+        Returns:
+            New columns with translated quantities, or these columns if the ratio is invalid.
+        """
+        if not isinstance(ratio, float) and not isinstance(ratio, int):
+            return self
+        if ratio == 1:
+            return self
+        quantities = np.where(self.quantities == Ingredient.NO_QUANTITY,
+                              self.quantities, self.quantities * ratio)
+        return IngredientColumns(self.names, quantities, self.unit_codes,
+                                 self.recipe_ids, self.units)
@@ -0,0 +1,193 @@
+"""This file provides a crawler that keeps a local mirror of TheMealDB."""
+
+from contextlib import contextmanager
+import argparse
+import asyncio
+import hashlib
+import json
+import sqlite3
+import string
+import sys
+import time
+
+from download import DownloadError, fetch_recipes, get_client, search_meals
+
+DEFAULT_MIRROR_PATH = 'mirror.sqlite3'
+
+# First letters that meal names are searched by
+LETTERS = string.ascii_lowercase + string.digits
+
+
+def get_recipe_hash(recipe):
+    """
+    Computes the content hash of a recipe.
+
+    Args:
+        recipe: Recipe as returned by process_meal.
+
+    Returns:
+        Hex digest of the recipe content.
+    """
+    content = json.dumps(recipe, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class Mirror:
+    """
+    Class representing a local store of recipes from TheMealDB.
+
+    Recipes are stored as returned by process_meal, keyed by meal ID.
+    """
+
+    def __init__(self, path=DEFAULT_MIRROR_PATH):
+        self.path = path
+        with self.connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS recipes ('
+                               'id TEXT PRIMARY KEY, name TEXT NOT NULL, hash TEXT NOT NULL, '
+                               'data TEXT NOT NULL, updated_at REAL NOT NULL)')
+
+    @contextmanager
+    def connect(self):
+        """
+        Opens a connection that commits on success and is always closed.
+        """
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def put(self, recipe):
+        """
+        Stores a recipe if it is new or has changed.
+
+        Args:
+            recipe: Recipe as returned by process_meal.
+
+        Returns:
+            'new', 'changed' or 'unchanged'.
+        """
+        recipe_hash = get_recipe_hash(recipe)
+        with self.connect() as connection:
+            row = connection.execute(
+                'SELECT hash FROM recipes WHERE id = ?', (recipe['id'],)).fetchone()
+            if row and row[0] == recipe_hash:
+                return 'unchanged'
+            connection.execute('INSERT OR REPLACE INTO recipes VALUES (?, ?, ?, ?, ?)',
+                               (recipe['id'], recipe['name'], recipe_hash, json.dumps(recipe), time.time()))
+        return 'changed' if row else 'new'
+
+    def get_recipe(self, id):
+        """
+        Gets a recipe by meal ID.
+
+        Args:
+            id: Meal ID.
+
+        Returns:
+            Recipe as returned by process_meal, or an empty dictionary if it is not mirrored.
+        """
+        with self.connect() as connection:
+            row = connection.execute(
+                'SELECT data FROM recipes WHERE id = ?', (str(id),)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def find_recipe_by_name(self, query):
+        """
+        Finds a recipe whose name contains the query, like searching meal by name on API.
+
+        Args:
+            query: Search query for meal.
+
+        Returns:
+            Recipe as returned by process_meal, or an empty dictionary if none matches.
+        """
+        with self.connect() as connection:
+            row = connection.execute('SELECT data FROM recipes WHERE instr(lower(name), ?) > 0 '
+                                     'ORDER BY id LIMIT 1', (query.lower(),)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def iter_recipes(self):
+        """
+        Iterates over all mirrored recipes in meal ID order.
+
+        Yields:
+            Recipes as returned by process_meal.
+        """
+        with self.connect() as connection:
+            for row in connection.execute('SELECT data FROM recipes ORDER BY id'):
+                yield json.loads(row[0])
+
+
+def crawl(mirror, letters=LETTERS, client=None):
+    """
+    Walks the search endpoint by first letter and stores every new or changed meal.
+
+    Args:
+        mirror: Mirror to store meals in.
+        letters: First letters to search by.
+        client: Download client to use. Defaults to the shared client.
+
+    Returns:
+        Dictionary with mapping from 'new', 'changed', 'unchanged' and 'errors' to counts.
+    """
+    counts = {'new': 0, 'changed': 0, 'unchanged': 0, 'errors': 0}
+    for letter in letters:
+        try:
+            recipes = search_meals(client, f=letter)
+        except DownloadError as e:
+            print(e, file=sys.stderr)
+            counts['errors'] += 1
+            continue
+        for recipe in recipes:
+            counts[mirror.put(recipe)] += 1
+    return counts
+
+
+async def crawl_ids(mirror, ids, limit=8, client=None):
+    """
+    Looks up meals by ID concurrently and stores every new or changed meal.
+
+    Args:
+        mirror: Mirror to store meals in.
+        ids: Iterable of meal IDs.
+        limit: Maximum number of concurrent requests.
+        client: Download client to use. Defaults to the shared client.
+
+    Returns:
+        Dictionary with mapping from 'new', 'changed', 'unchanged' and 'errors' to counts.
+    """
+    counts = {'new': 0, 'changed': 0, 'unchanged': 0, 'errors': 0}
+    async for id, recipe, error in fetch_recipes(ids, limit, client):
+        if error:
+            print(error, file=sys.stderr)
+            counts['errors'] += 1
+            continue
+        counts[mirror.put(recipe)] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mirror', default=DEFAULT_MIRROR_PATH,
+                        help=f'Path to the mirror (default: {DEFAULT_MIRROR_PATH})')
+    parser.add_argument('--letters', default=LETTERS,
+                        help='First letters to search meals by')
+    parser.add_argument('--ids', nargs='*', default=[],
+                        help='Meal IDs to look up instead of searching by first letter')
+    parser.add_argument('--limit', type=int, default=8,
+                        help='Maximum number of concurrent lookups')
+    args = parser.parse_args()
+
+    mirror = Mirror(args.mirror)
+    client = get_client()
+    if args.ids:
+        counts = asyncio.run(crawl_ids(mirror, args.ids, args.limit, client))
+    else:
+        counts = crawl(mirror, args.letters, client)
+    print(', '.join(f'{count} {status}' for status, count in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,31 +1,285 @@
 """This file provides operations to download recipes."""
 
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.parse
+
 import requests
+from requests.adapters import HTTPAdapter
+
+# Base URL of TheMealDB API. Point it at a local server to work against a stand-in.
+API_URL = os.environ.get(
+    'COOKBOOK_API_URL', 'https://www.themealdb.com/api/json/v1/1')
+
+HTTP_CACHE_DIR = os.path.join(os.environ.get('COOKBOOK_CACHE_DIR', os.path.join(
+    os.path.expanduser('~'), '.cache', 'cookbook')), 'http')
+
+# Response statuses that are worth retrying
+RETRY_STATUSES = (429, 500, 502, 503, 504)
 
 
-def download_recipe_by_name(query):
+class DownloadError(Exception):
     """
-    Downloads recipe from API through searching meal by name.
+    Raised when a recipe cannot be downloaded.
+    """
+
+
+class DownloadClient:
+    """
+    Class representing an HTTP client for the API.
+
+    Connections are pooled, requests time out and are retried with jittered
+    exponential backoff, and JSON responses are cached on disk. A cached
+    response is served until its TTL expires. After that it is revalidated with
+    its ETag or Last-Modified date, and within the stale-while-revalidate window
+    the stale response is served while it is revalidated in the background.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, timeout=10, retries=3, backoff=0.5,
+                 ttl=24 * 60 * 60, stale_ttl=7 * 24 * 60 * 60, pool_size=10):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.revalidating = set()
+        self.lock = threading.Lock()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get_json(self, url):
+        """
+        Gets the JSON response of a URL, from the cache if it is fresh.
+
+        Args:
+            url: URL to get.
+
+        Returns:
+            Decoded JSON response.
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails after retrying.
+            ValueError: If the response is not valid JSON.
+        """
+        entry = self.read_entry(url)
+        now = time.time()
+        if entry and now < entry['expires_at']:
+            return json.loads(entry['body'])
+        if entry and now < entry['stale_until']:
+            self.revalidate_in_background(url, entry)
+            return json.loads(entry['body'])
+        return self.fetch(url, entry)
+
+    def fetch(self, url, entry=None):
+        """
+        Fetches a URL and caches its response.
+
+        Args:
+            url: URL to fetch.
+            entry: Cached entry for the URL to revalidate, if any.
+
+        Returns:
+            Decoded JSON response.
+        """
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self.request(url, headers)
+        if response.status_code == 304 and entry:
+            self.write_entry(url, response, entry['body'], entry)
+            return json.loads(entry['body'])
+
+        response.raise_for_status()
+        data = response.json()
+        self.write_entry(url, response, response.text)
+        return data
+
+    def request(self, url, headers):
+        """
+        Sends a GET request, retrying on connection errors, timeouts and retryable statuses.
+
+        Args:
+            url: URL to get.
+            headers: Dictionary of request headers.
+
+        Returns:
+            Response of the last attempt.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(
+                    url, headers=headers, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+            # Full jitter spreads out retries from many clients
+            time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def revalidate_in_background(self, url, entry):
+        """
+        Revalidates a stale cached response in a background thread.
+
+        Args:
+            url: URL to revalidate.
+            entry: Stale cached entry for the URL.
+        """
+        with self.lock:
+            if url in self.revalidating:
+                return
+            self.revalidating.add(url)
+
+        def revalidate():
+            try:
+                self.fetch(url, entry)
+            except (requests.exceptions.RequestException, ValueError):
+                # Keep serving the stale response until a revalidation succeeds
+                pass
+            finally:
+                with self.lock:
+                    self.revalidating.discard(url)
+
+        threading.Thread(target=revalidate, daemon=True).start()
+
+    def get_entry_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def read_entry(self, url):
+        """
+        Reads the cached entry for a URL.
+
+        Args:
+            url: URL to read the entry of.
+
+        Returns:
+            Dictionary representing the entry, or None if there is none.
+        """
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self.get_entry_path(url), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def write_entry(self, url, response, body, previous=None):
+        """
+        Writes the cached entry for a URL, unless the response forbids caching.
+
+        Args:
+            url: URL to write the entry of.
+            response: Response that the entry is valid for.
+            body: Body of the cached response.
+            previous: Entry being revalidated, whose validators are kept if the response has none.
+        """
+        if not self.cache_dir:
+            return
+        directives = parse_cache_control(
+            response.headers.get('Cache-Control', ''))
+        if 'no-store' in directives:
+            return
+
+        ttl = to_seconds(directives.get('max-age'), self.ttl)
+        stale_ttl = to_seconds(directives.get(
+            'stale-while-revalidate'), self.stale_ttl)
+        now = time.time()
+        entry = {
+            'url': url,
+            'body': body,
+            'etag': response.headers.get('ETag') or (previous and previous['etag']),
+            'last_modified': (response.headers.get('Last-Modified')
+                              or (previous and previous['last_modified'])),
+            'expires_at': now + ttl,
+            'stale_until': now + ttl + stale_ttl
+        }
+
+        # Write to a temporary file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(temp_path, self.get_entry_path(url))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def parse_cache_control(header):
+    """
+    Parses a Cache-Control header.
 
     Args:
-        query: Search query for meal
+        header: Value of the header.
 
     Returns:
-        Dictionary containing recipe name, instructions, and ingredients of searched recipe
+        Dictionary with mapping from directive to its value, or None if it has no value.
     """
-    url = 'https://www.themealdb.com/api/json/v1/1/search.php?s={}'.format(
-        query)
+    directives = {}
+    for directive in header.split(','):
+        key, _, value = directive.strip().partition('=')
+        if key:
+            directives[key.lower()] = value.strip('"') if value else None
+    return directives
+
+
+def to_seconds(value, default):
     try:
-        response = requests.get(url)
-    except requests.exceptions.MissingSchema:
-        return {}
+        return int(value)
+    except (TypeError, ValueError):
+        return default
 
-    if not response.ok:
-        return {}
 
+_client = None
+
+
+def get_client():
+    """
+    Gets the shared download client, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        _client = DownloadClient()
+    return _client
+
+
+def download_recipe_by_name(query, client=None):
+    """
+    Downloads recipe from API through searching meal by name.
+
+    Args:
+        query: Search query for meal
+        client: Download client to use. Defaults to the shared client.
+
+    Returns:
+        Dictionary containing recipe name, instructions, and ingredients of searched recipe
+    """
+    url = '{}/search.php?{}'.format(API_URL,
+                                    urllib.parse.urlencode({'s': query}))
     try:
-        response_json = response.json()
-    except ValueError:
+        response_json = (client or get_client()).get_json(url)
+    except (requests.exceptions.RequestException, ValueError):
         return {}
 
     if not response_json['meals']:
@@ -34,30 +288,146 @@ def download_recipe_by_name(query):
     return process_recipe_from_api(response_json)
 
 
-def download_recipe_by_url(url):
+def search_meals(client=None, **params):
+    """
+    Searches meals on API, returning every match.
+
+    Args:
+        client: Download client to use. Defaults to the shared client.
+        params: Search parameters, such as s for name or f for first letter.
+
+    Returns:
+        List of recipes as returned by process_meal.
+
+    Raises:
+        DownloadError: If the request fails or the response is invalid.
+    """
+    url = '{}/search.php?{}'.format(API_URL, urllib.parse.urlencode(params))
+    client = client or get_client()
+    try:
+        # Revalidate instead of trusting the cached response, which is cheap with an ETag
+        response_json = client.fetch(url, client.read_entry(url))
+    except requests.exceptions.RequestException as e:
+        raise DownloadError(f'Request to {url} failed: {e}') from e
+    except ValueError as e:
+        raise DownloadError(f'Response from {url} is not valid JSON') from e
+
+    if not isinstance(response_json, dict):
+        raise DownloadError(f'Unexpected response from {url}')
+    return [process_meal(meal) for meal in response_json.get('meals') or []]
+
+
+def download_recipe_by_url(url, client=None):
     """
     Downloads recipe from API through URL.
 
     Args:
         url: URL of recipe to download
+        client: Download client to use. Defaults to the shared client.
 
     Returns:
         Dictionary containing recipe name, instructions, and ingredients of searched recipe
     """
     try:
-        response = requests.get(url)
-    except requests.exceptions.MissingSchema:
+        return fetch_recipe(url, client)
+    except DownloadError:
         return {}
 
-    if not response.ok:
-        return {}
 
+def get_lookup_url(id_or_url):
+    """
+    Gets the URL to look up a recipe.
+
+    Args:
+        id_or_url: ID of a meal, or a URL that is returned as is.
+
+    Returns:
+        URL of the recipe.
+    """
+    id_or_url = str(id_or_url)
+    if '://' in id_or_url:
+        return id_or_url
+    return '{}/lookup.php?{}'.format(API_URL, urllib.parse.urlencode({'i': id_or_url}))
+
+
+def fetch_recipe(url, client=None):
+    """
+    Downloads recipe from API through URL, raising an error on failure.
+
+    Args:
+        url: URL of recipe to download
+        client: Download client to use. Defaults to the shared client.
+
+    Returns:
+        Dictionary containing recipe name, instructions, and ingredients of recipe
+
+    Raises:
+        DownloadError: If the request fails, the response is invalid, or there is no recipe or it is malformed.
+    """
     try:
-        response_json = response.json()
-    except ValueError:
-        return {}
+        response_json = (client or get_client()).get_json(url)
+    except requests.exceptions.RequestException as e:
+        raise DownloadError(f'Request to {url} failed: {e}') from e
+    except ValueError as e:
+        raise DownloadError(f'Response from {url} is not valid JSON') from e
 
-    return process_recipe_from_api(response_json)
+    if not isinstance(response_json, dict) or not response_json.get('meals'):
+        raise DownloadError(f'No recipe found at {url}')
+
+    try:
+        return process_recipe_from_api(response_json)
+    except (KeyError, TypeError, AttributeError, IndexError) as e:
+        raise DownloadError(f'Recipe at {url} is malformed: {e!r}') from e
+
+
+def fetch_recipe_result(id_or_url, client):
+    """
+    Downloads a recipe by ID or URL, capturing errors.
+
+    Returns:
+        Tuple of the given ID or URL, the recipe or None, and the DownloadError or None.
+    """
+    try:
+        return id_or_url, fetch_recipe(get_lookup_url(id_or_url), client), None
+    except DownloadError as e:
+        return id_or_url, None, e
+
+
+async def fetch_recipes(ids_or_urls, limit=8, client=None):
+    """
+    Downloads recipes concurrently, yielding each as soon as it completes.
+
+    At most limit requests are in flight at a time, and ids_or_urls is consumed
+    lazily, so it may be a long-running iterator. limit should not exceed the
+    connection pool size of the client.
+
+    Args:
+        ids_or_urls: Iterable of meal IDs or recipe URLs.
+        limit: Maximum number of concurrent requests.
+        client: Download client to use. Defaults to the shared client.
+
+    Yields:
+        Tuples of the given ID or URL, the recipe or None, and the DownloadError or None, in completion order.
+    """
+    client = client or get_client()
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=limit)
+    pending = set()
+    try:
+        for id_or_url in ids_or_urls:
+            if len(pending) >= limit:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(loop.run_in_executor(
+                executor, fetch_recipe_result, id_or_url, client))
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def process_recipe_from_api(data):
@@ -70,13 +440,27 @@ def process_recipe_from_api(data):
     Returns:
         Dictionary containing recipe name, instructions, and ingredients
     """
+    return process_meal(data['meals'][0])
+
+
+def process_meal(meal):
+    """
+    Transforms a meal returned by API into relevant data.
+
+    Args:
+        meal: Meal in the list of meals returned by API
+
+    Returns:
+        Dictionary containing recipe ID, name, instructions, and ingredients
+    """
     recipe = {}
-    recipe['name'] = data['meals'][0]['strMeal']
-    recipe['instructions'] = data['meals'][0]['strInstructions']
+    recipe['id'] = meal.get('idMeal')
+    recipe['name'] = meal['strMeal']
+    recipe['instructions'] = meal['strInstructions']
     recipe['ingredients'] = {}
     for i in range(1, 21):
-        ingredient = data['meals'][0]['strIngredient{}'.format(i)]
-        measure = data['meals'][0]['strMeasure{}'.format(i)]
+        ingredient = meal['strIngredient{}'.format(i)]
+        measure = meal['strMeasure{}'.format(i)]
 
         if not ingredient or ingredient == '' or not measure or measure == '':
             break
@@ -2,77 +2,150 @@
 
 from collections import defaultdict
 from unicodedata import numeric
+import os
 import re
 
 import ftfy
-import spacy
 
-from ingredient import Ingredient
+from ingredient import Ingredient, IngredientMatcher
+from model import ANNOTATOR_PIPES, STEP_ANNOTATORS, parse, parse_many
+from profiling import profiled
+from quantity_span import QuantitySpan
 from step import Step
-
-nlp = spacy.load("en_core_web_md")
-
-
+from units import DEGREES_PATTERN, QUANTITY_PATTERN
+
+# Version of the extraction logic. Bump when a change alters extracted output
+# so that cached parsed recipes are invalidated.
+EXTRACTOR_VERSION = '3'
+
+# Number of sentences sent through the pipeline at a time during segmentation
+SENTENCE_BATCH_SIZE = 64
+
+# Ways to find the imperative sentences that start steps, from most accurate to
+# fastest. 'full' tags sentences with the whole pipeline, 'tagger' with only the
+# components is_imperative needs, and 'lexicon' looks up the first word in
+# COOKING_VERBS without running the model.
+EXTRACTION_TIERS = ('full', 'tagger', 'lexicon')
+EXTRACTION_TIER = os.environ.get('COOKBOOK_EXTRACTION_TIER', 'tagger')
+
+# Verbs that start steps in recipe instructions
+COOKING_VERBS = frozenset([
+    'add', 'adjust', 'allow', 'arrange', 'assemble', 'bake', 'baste', 'beat', 'blanch', 'blend',
+    'blitz', 'boil', 'braise', 'bring', 'broil', 'brown', 'brush', 'burn', 'carve', 'char',
+    'check', 'chill', 'chop', 'coat', 'combine', 'cook', 'cool', 'core', 'cover', 'crack',
+    'cream', 'crimp', 'crumble', 'crush', 'cube', 'cut', 'debone', 'deep', 'deglaze', 'defrost',
+    'dice', 'dip', 'discard', 'dissolve', 'divide', 'drain', 'drizzle', 'dry', 'dust', 'eat',
+    'enjoy', 'fill', 'finish', 'flake', 'flatten', 'flip', 'fold', 'fry', 'garnish', 'glaze',
+    'grate', 'grease', 'grill', 'grind', 'heat', 'knead', 'ladle', 'layer', 'leave', 'let',
+    'line', 'liquidise', 'liquidize', 'marinate', 'mash', 'measure', 'melt', 'microwave',
+    'mince', 'mix', 'moisten', 'pat', 'peel', 'pick', 'pierce', 'pinch', 'pipe', 'place',
+    'plate', 'poach', 'pop', 'pour', 'preheat', 'prepare', 'press', 'prick', 'process', 'pulse',
+    'puree', 'push', 'put', 'reduce', 'refrigerate', 'reheat', 'remove', 'repeat', 'rest',
+    'return', 'rinse', 'roast', 'roll', 'rub', 'saute', 'scatter', 'scoop', 'score', 'scrape',
+    'scrub', 'sear', 'season', 'separate', 'serve', 'set', 'shake', 'shape', 'shred', 'sieve',
+    'sift', 'simmer', 'skewer', 'skim', 'slice', 'smash', 'soak', 'spoon', 'spray', 'spread',
+    'sprinkle', 'squeeze', 'steam', 'steep', 'stir', 'store', 'strain', 'stuff', 'swirl', 'take',
+    'taste', 'tip', 'toast', 'top', 'toss', 'transfer', 'trim', 'turn', 'wash', 'whip', 'whisk',
+    'wipe', 'wrap', 'zest',
+])
+
+FIRST_WORD_PATTERN = re.compile(r'\s*([A-Za-z]+)')
+
+
+# Mapping from vulgar fraction to its decimal value
+VULGAR_FRACTIONS = {frac: str(round(numeric(frac), 2))
+                    for frac in '¼½¾⅐⅑⅒⅓⅔⅕⅖⅗⅘⅙⅚⅛⅜⅝⅞⅟↉'}
+
+VULGAR_FRACTION_PATTERN = re.compile(f'[{"".join(VULGAR_FRACTIONS)}]')
+
+# Characters in ASCII text that ftfy would change: HTML entities and control
+# characters other than whitespace
+ASCII_TO_FIX_PATTERN = re.compile('[&\x00-\x08\x0b\x0e-\x1f\x7f]')
+
+fix_text = profiled('ftfy', texts_arg=0)(ftfy.fix_text)
+
+
+@profiled('preprocess')
 def preprocess(t):
     """
     Fixes mojibake, removes extra whitespace, and replaces vulgar fractions.
     """
-    VULGAR_FRACTIONS = ['¼', '½', '¾', '⅐', '⅑', '⅒', '⅓', '⅔',
-                        '⅕', '⅖', '⅗', '⅘', '⅙', '⅚', '⅛', '⅜', '⅝', '⅞', '⅟', '↉']
-    t = ftfy.fix_text(t)
-    for frac in VULGAR_FRACTIONS:
-        while re.search(frac, t):
-            m = re.search(frac, t).group()
-            converted = str(round(numeric(m), 2))
-            t = t.replace(m, converted)
+    # Clean ASCII text has no mojibake or fractions to fix
+    if not t.isascii() or ASCII_TO_FIX_PATTERN.search(t):
+        t = fix_text(t)
+        t = VULGAR_FRACTION_PATTERN.sub(
+            lambda m: VULGAR_FRACTIONS[m.group()], t)
+    return collapse_whitespace(t)
 
-    return re.sub('\s+', ' ', t)
+
+def collapse_whitespace(t):
+    """
+    Replaces each run of whitespace with a single space, like re.sub('\\s+', ' ', t).
+    """
+    collapsed = ' '.join(t.split())
+    if not collapsed:
+        return ' ' if t else ''
+    if t[0].isspace():
+        collapsed = ' ' + collapsed
+    if t[-1].isspace():
+        collapsed += ' '
+    return collapsed
 
 
-def is_imperative(sentence):
+def is_imperative(doc):
     """
     Checks if sentence is imperative.
 
     Args:
-        sentence: Sentence to check.
+        doc: Tagged sentence to check.
 
     Returns:
         True, if sentence is imperative. False otherwise.
     """
-    doc = nlp(sentence)
-
     first_token = doc[0]
     if first_token.tag_ == 'VB':
         return True
     return False
 
 
-def get_verbs(imperative_sentence):
+def is_imperative_by_lexicon(sentence):
+    """
+    Checks if sentence is imperative by looking up its first word in COOKING_VERBS.
+
+    Args:
+        sentence: Sentence to check.
+
+    Returns:
+        True, if sentence starts with a cooking verb. False otherwise.
+    """
+    m = FIRST_WORD_PATTERN.match(sentence)
+    return m is not None and m.group(1).lower() in COOKING_VERBS
+
+
+def get_verbs(doc):
     """
     Extracts the verbs from an imperative sentence.
 
     Args:
-        imperative_sentence: Imperative sentence to extract from. 
+        doc: Parsed imperative sentence to extract from.
 
     Returns:
         List of verbs.
     """
-    doc = nlp(imperative_sentence)
-
     verbs = []
     for i, token in enumerate(doc):
         # Assuming sentence is imperative, 1st token should be an action
         if i == 0 or token.tag_ == 'VB':
-            verbs.append(token.text.lower())
+            verbs.append(token.lower_)
     return verbs
 
 
-def get_main_action(imperative_sentence, actions):
+def get_main_action(doc, actions):
     """
     Extracts the main action from an imperative sentence.
 
     Args:
-        imperative_sentence: Imperative sentence to extract from. 
+        doc: Parsed imperative sentence to extract from.
         actions: List of verbs in the imperative sentence.
 
     Returns:
@@ -82,166 +155,200 @@ def get_main_action(imperative_sentence, actions):
         return ''
 
     main_action = [actions[0]]
-    doc = nlp(imperative_sentence.lower())
     for token in doc:
-        if token.text == main_action[0]:
+        if token.lower_ == main_action[0]:
             for child in token.children:
                 if child.dep_ in ['dobj']:
-                    main_action.append(child.text)
+                    main_action.append(child.lower_)
             break
     return ' '.join(main_action)
 
 
-def get_noun_compounds(sentence):
+def get_noun_compounds(doc):
     """
     Extracts compounds that behave as a single noun from a sentence.
 
     Args:
-        sentence: Sentence to extract from. 
+        doc: Parsed sentence to extract from.
 
     Returns:
         List of compounds.
     """
-    doc = nlp(sentence)
-
     compounds = []
     for token in doc:
         if token.pos_ == 'NOUN':
             compound = []
             for child in token.children:
                 if child.dep_ == 'compound' or child.dep_ == 'nmod':
-                    compound.append(child.text.lower())
-            compound.append(token.text.lower())
+                    compound.append(child.lower_)
+            compound.append(token.lower_)
             compounds.append(' '.join(compound))
     return compounds
 
 
-def extract_ingredients_from_step(sentence, ingredients):
+def extract_ingredients_from_step(doc, matcher):
     """
     Extracts ingredients from sentence that appear in list of ingredients.
 
     Args:
-        sentence: Sentence to extract from.
-        ingredients: List of ingredients for recipe.
+        doc: Parsed sentence to extract from.
+        matcher: Ingredient matcher over the ingredients for recipe.
 
     Returns:
         List of ingredients in sentence.
     """
-    noun_compounds = get_noun_compounds(sentence)
+    noun_compounds = get_noun_compounds(doc)
     step_ingredients = set()
     for noun_compound in noun_compounds:
-        for ingredient in ingredients:
-            if ingredient.is_similar(noun_compound):
-                step_ingredients.add(ingredient)
-                break
+        ingredient = matcher.match(noun_compound)
+        if ingredient is not None:
+            step_ingredients.add(ingredient)
     return list(step_ingredients)
 
 
-def get_indirect_objects(sentence):
+def get_indirect_objects(doc):
     """
     Extracts the indirect objects from a sentence.
 
     Args:
-        sentence: Sentence to extract from. 
+        doc: Parsed sentence to extract from.
 
     Returns:
-        List of indirect objects.
+        List of tokens that are indirect objects.
     """
-    doc = nlp(sentence)
-
     indirect_objects = []
     for token in doc:
         if token.dep_ == 'pobj':
-            indirect_objects.append(token.text.lower())
+            indirect_objects.append(token)
     return indirect_objects
 
 
-def extract_tools(sentence, ingredients, name):
+@profiled('extract_tools')
+def extract_tools(doc, matcher, name):
     """
     Extracts kitchen tools from sentence.
 
     Args:
-        sentence: Sentence to extract from.
-        ingredients: List of ingredients for recipe.
+        doc: Parsed sentence to extract from.
+        matcher: Ingredient matcher over the ingredients for recipe.
         name: Name of recipe.
 
     Returns:
         List of strings representing tools used in this sentence.
     """
     NON_TOOLS = ['mins', 'gas', 'heat', 'secs', 'it']
-    indirect_objects = get_indirect_objects(sentence)
-    tools = []
-    for obj in indirect_objects:
-        if obj in NON_TOOLS or obj in name.lower():
+    lower_name = name.lower()
+    tool_compounds = []
+    for token in get_indirect_objects(doc):
+        obj = token.lower_
+        if obj in NON_TOOLS or obj in lower_name:
             continue
-        if any(ingredient.is_similar(obj) for ingredient in ingredients):
+        if matcher.is_similar_to_any(obj):
             continue
-        tools.append(obj)
-
-    doc = nlp(sentence.lower())
-    i = 0
-    tool_compounds = []
-    for tool in tools:
-        while doc[i].text != tool:
-            i += 1
-
-        token = doc[i]
 
         compound = []
         for child in token.children:
             if child.dep_ == 'compound' or child.dep_ == 'nmod' or child.dep_ == 'amod':
-                compound.append(child.text.lower())
-        compound.append(token.text.lower())
+                compound.append(child.lower_)
+        compound.append(obj)
         tool_compounds.append(' '.join(compound))
 
-        i += 1
-
     return tool_compounds
 
 
-def extract_time_parameters(sentence):
+@profiled('extract_time_parameters')
+def extract_time_parameters(doc):
     """
     Extracts time parameters from sentence.
 
     Args:
-        sentence: Sentence to extract from.
+        doc: Parsed sentence to extract from.
 
     Returns:
         Dictionary with mapping from action verb to time parameters.
     """
-    doc = nlp(sentence)
-
-    time_entities = []
+    time_parameters = defaultdict(list)
     for ent in doc.ents:
-        if ent.label_ == 'TIME':
-            time_entities.append(ent.text.lower())
-
-    doc = nlp(sentence.lower())
-    i = 0
-    actions = []
-    for ent in time_entities:
-        word_to_find = ent.split()[-1]
-
-        while doc[i].text != word_to_find:
-            i += 1
-
-        token = doc[i]
+        if ent.label_ != 'TIME':
+            continue
 
+        # The last token of the entity is aligned through the entity span, so
+        # the governing verb is found without re-parsing the lowercased text
+        token = ent[-1]
         while token.has_head() and token.head != token:
             if token.tag_ == 'VB':
                 break
             token = token.head
 
-        actions.append(token.text.lower())
-        i += 1
-
-    time_parameters = defaultdict(list)
-    for ent, action in zip(time_entities, actions):
-        time_parameters[action].append(ent)
+        time_parameters[token.lower_].append(ent.text.lower())
 
     return time_parameters
 
 
+def format_oven_temperature(m):
+    """
+    Formats a temperature like '200c/180c fan/gas 6'.
+    """
+    t, f, g = m.split('/')
+    return ' or '.join((t.replace('c', '°C'), f.replace('c', '°C'), g))
+
+
+def format_oven_temperature_fan_first(m):
+    """
+    Formats a temperature like '200c/fan 180c/gas 6'.
+    """
+    t, f, g = m.split('/')
+    return ' or '.join((t.replace('c', '°C'), f[4:].replace('c', '°C') + ' fan', g))
+
+
+def format_oven_temperature_degrees(m):
+    """
+    Formats a temperature like '200°c/fan180°c/gas 6'.
+    """
+    t, f, g = m.replace('c', 'C').split('/')
+    return ' or '.join((t, f[3:] + ' fan', g))
+
+
+def format_oven_temperature_fahrenheit(m):
+    """
+    Formats a temperature like '200c/400f/gas 6'.
+    """
+    t, _, g = m.split('/')
+    return ' or '.join((t.replace('c', '°C'), g))
+
+
+def format_oven_temperature_gas_mark(m):
+    """
+    Formats a temperature like '200°c/400°f/gas mark 6'.
+    """
+    t, _, g = m.split('/')
+    return ' or '.join((t.replace('c', 'C'), g.replace('mark ', '')))
+
+
+# Recognized temperature formats, tried in this order at each position
+TEMPERATURE_PATTERN = re.compile(
+    r'(?P<oven>\d+c/\d+c fan/gas \d+)'
+    r'|(?P<oven_fan_first>\d+c/fan \d+c/gas \d+)'
+    r'|(?P<oven_degrees>\d+°c/fan\d+°c/gas \d+)'
+    r'|(?P<oven_fahrenheit>\d+c/\d+f/gas \d+)'
+    r'|(?P<oven_gas_mark>\d+°c/\d+°f/gas mark \d+)'
+    r'|(?P<celsius>\d+°c)'
+    r'|(?P<fahrenheit>\d+°f)', re.IGNORECASE)
+
+# Mapping from temperature format to the order it is reported in, how the
+# lowercased match is formatted, and whether it is rewritten in the sentence
+TEMPERATURE_FORMATS = {
+    'oven': (0, format_oven_temperature, True),
+    'oven_fan_first': (1, format_oven_temperature_fan_first, True),
+    'oven_degrees': (2, format_oven_temperature_degrees, True),
+    'oven_fahrenheit': (3, format_oven_temperature_fahrenheit, True),
+    'oven_gas_mark': (4, format_oven_temperature_gas_mark, True),
+    'celsius': (5, lambda m: m.replace('c', 'C'), False),
+    'fahrenheit': (6, lambda m: m.replace('f', 'F'), False),
+}
+
+
+@profiled('extract_temperature_parameters')
 def extract_temperature_parameters(sentence):
     """
     Extracts temperature parameters from sentence and standardizes temperature format in sentence.
@@ -250,82 +357,121 @@ def extract_temperature_parameters(sentence):
         sentence: Sentence to extract from.
 
     Returns:
-        Dictionary with mapping from action verb to temperature parameters and processed sentence.
+        Tuple of list of temperature parameters and processed sentence.
     """
     HEAT_LEVEL_KEYWORDS = ('low heat', 'medium heat',
                            'medium-high heat', 'meadium high heat', 'high heat')
-    temperature_parameters = []
     lower_sentence = sentence.lower()
+    temperature_parameters = [
+        keyword for keyword in HEAT_LEVEL_KEYWORDS if keyword in lower_sentence]
+
+    # Temperatures are found in one left-to-right pass, then reported grouped
+    # by format in the order of TEMPERATURE_FORMATS. Repeated temperatures are
+    # reported once and only their first occurrence is rewritten.
+    found = []
+    seen = set()
+    pieces = []
+    last = 0
+    for match in TEMPERATURE_PATTERN.finditer(sentence):
+        kind = match.lastgroup
+        m = match.group().lower()
+        if (kind, m) in seen:
+            continue
+        seen.add((kind, m))
+
+        order, format_parameter, rewrite = TEMPERATURE_FORMATS[kind]
+        param = format_parameter(m)
+        found.append((order, param))
+        if rewrite:
+            pieces.append(sentence[last:match.start()])
+            pieces.append(param)
+            last = match.end()
+    pieces.append(sentence[last:])
+
+    found.sort(key=lambda f: f[0])
+    temperature_parameters.extend(param for _, param in found)
+    return temperature_parameters, ''.join(pieces)
+
 
-    for keyword in HEAT_LEVEL_KEYWORDS:
-        if keyword in lower_sentence:
-            temperature_parameters.append(keyword)
-
-    while re.search('\d+c/\d+c fan/gas \d+', lower_sentence):
-        m = re.search('\d+c/\d+c fan/gas \d+', lower_sentence).group()
-        m_list = m.split('/')
-        t, f, g = m_list[0].replace(
-            'c', '°C'), m_list[1].replace('c', '°C'), m_list[2]
-        param = ' or '.join((t, f, g))
-        temperature_parameters.append(param)
-        lower_sentence = lower_sentence.replace(m, '')
-        start_index = sentence.lower().index(m)
-        end_index = start_index + len(m)
-        sentence = sentence[:start_index] + param + sentence[end_index:]
-    while re.search('\d+c\/fan \d+c\/gas \d+', lower_sentence):
-        m = re.search('\d+c\/fan \d+c\/gas \d+', lower_sentence).group()
-        m_list = m.split('/')
-        t, f, g = m_list[0].replace(
-            'c', '°C'), m_list[1][4:].replace('c', '°C') + ' fan', m_list[2]
-        param = ' or '.join((t, f, g))
-        temperature_parameters.append(param)
-        lower_sentence = lower_sentence.replace(m, '')
-        start_index = sentence.lower().index(m)
-        end_index = start_index + len(m)
-        sentence = sentence[:start_index] + param + sentence[end_index:]
-    while re.search('\d+°c\/fan\d+°c\/gas \d+', lower_sentence):
-        m = re.search('\d+°c\/fan\d+°c\/gas \d+', lower_sentence).group()
-        m_list = m.replace('c', 'C').split('/')
-        t, f, g = m_list[0], m_list[1][3:] + ' fan', m_list[2]
-        param = ' or '.join((t, f, g))
-        temperature_parameters.append(param)
-        lower_sentence = lower_sentence.replace(m, '')
-        start_index = sentence.lower().index(m)
-        end_index = start_index + len(m)
-        sentence = sentence[:start_index] + param + sentence[end_index:]
-    while re.search('\d+c\/\d+f\/gas \d+', lower_sentence):
-        m = re.search('\d+c\/\d+f\/gas \d+', lower_sentence).group()
-        m_list = m.split('/')
-        t, g = m_list[0].replace('c', '°C'), m_list[2]
-        param = ' or '.join((t, g))
-        temperature_parameters.append(param)
-        lower_sentence = lower_sentence.replace(m, '')
-        start_index = sentence.lower().index(m)
-        end_index = start_index + len(m)
-        sentence = sentence[:start_index] + param + sentence[end_index:]
-    while re.search('\d+°c\/\d+°f\/gas mark \d+', lower_sentence):
-        m = re.search('\d+°c\/\d+°f\/gas mark \d+', lower_sentence).group()
-        m_list = m.split('/')
-        t, g = m_list[0].replace('c', 'C'), m_list[2].replace('mark ', '')
-        param = ' or '.join((t, g))
-        temperature_parameters.append(param)
-        lower_sentence = lower_sentence.replace(m, '')
-        start_index, end_index = sentence.lower().index(
-            m), start_index + len(m)
-        sentence = sentence[:start_index] + param + sentence[end_index:]
-    while re.search('\d+°c', lower_sentence):
-        m = re.search('\d+°c', lower_sentence).group()
-        temperature_parameters.append(m.replace('c', 'C'))
-        lower_sentence = lower_sentence.replace(m, '')
-    while re.search('\d+°f', lower_sentence):
-        m = re.search('\d+°f', lower_sentence).group()
-        temperature_parameters.append(m.replace('f', 'F'))
-        lower_sentence = lower_sentence.replace(m, '')
-
-    return temperature_parameters, sentence
-
-
-def extract_steps(raw_instructions, ingredients, name):
+@profiled('extract_quantity_spans')
+def extract_quantity_spans(sentence):
+    """
+    Extracts the quantities with units and the temperatures in sentence.
+
+    Args:
+        sentence: Sentence to extract from.
+
+    Returns:
+        List of non-overlapping spans, ordered by position in sentence.
+    """
+    spans = []
+    for match in QUANTITY_PATTERN.finditer(sentence):
+        q_str, unit = match.groups()
+        q = int(q_str) if q_str.isnumeric() else float(q_str)
+        spans.append(QuantitySpan(match.start(), match.end(),
+                     q, unit, QuantitySpan.QUANTITY))
+    for match in DEGREES_PATTERN.finditer(sentence):
+        spans.append(QuantitySpan(match.start(), match.end(), float(
+            match.group(1)), match.group(2), QuantitySpan.TEMPERATURE))
+
+    spans.sort(key=lambda span: span.start)
+    non_overlapping = []
+    for span in spans:
+        if not non_overlapping or span.start >= non_overlapping[-1].end:
+            non_overlapping.append(span)
+    return non_overlapping
+
+
+@profiled('segment_instructions')
+def segment_instructions(instructions_list, batch_size=SENTENCE_BATCH_SIZE, tier=None):
+    """
+    Splits the instructions of one or more recipes into raw steps.
+
+    A new step starts at every imperative sentence. Unless the tier is
+    'lexicon', the sentences of all instructions are tagged together in batches.
+
+    Args:
+        instructions_list: List of preprocessed instructions.
+        batch_size: Number of sentences to tag at a time.
+        tier: One of EXTRACTION_TIERS. Defaults to EXTRACTION_TIER.
+
+    Returns:
+        List with the raw steps of each instructions, in the same order.
+
+    Raises:
+        ValueError: If tier is not one of EXTRACTION_TIERS.
+    """
+    tier = tier or EXTRACTION_TIER
+    if tier not in EXTRACTION_TIERS:
+        raise ValueError(f'Unknown extraction tier: {tier}')
+    sentences_list = [instructions.split('. ')
+                      for instructions in instructions_list]
+    candidates = [sentence + '.'
+                  for sentences in sentences_list for sentence in sentences[1:]]
+    if tier == 'lexicon':
+        imperatives = iter([is_imperative_by_lexicon(sentence)
+                            for sentence in candidates])
+    else:
+        annotators = list(ANNOTATOR_PIPES) if tier == 'full' else [
+            'imperative']
+        imperatives = iter([is_imperative(doc) for doc in parse_many(
+            candidates, annotators, batch_size)])
+
+    raw_steps_list = []
+    for sentences in sentences_list:
+        raw_steps = []
+        l = 0
+        for r in range(1, len(sentences)):
+            if next(imperatives):
+                raw_steps.append('. '.join(sentences[l:r]) + '.')
+                l = r
+        raw_steps.append('. '.join(sentences[l:]))
+        raw_steps_list.append(raw_steps)
+    return raw_steps_list
+
+
+@profiled('extract_steps')
+def extract_steps(raw_instructions, ingredients, name, batch_size=SENTENCE_BATCH_SIZE, step_cache=None, tier=None):
     """
     Extracts steps from recipe.
 
@@ -333,40 +479,63 @@ def extract_steps(raw_instructions, ingredients, name):
         raw_instructions: String representing the instructions in the recipe.
         ingredients: List of ingredients for recipe.
         name: Name of recipe.
+        batch_size: Number of sentences to tag at a time during segmentation.
+        step_cache: Cache of previously extracted steps, if any. Only steps that miss it are parsed.
+        tier: One of EXTRACTION_TIERS to segment steps with. Defaults to EXTRACTION_TIER.
 
     Returns:
         List of steps.
     """
-    raw_steps = []
     instructions = preprocess(raw_instructions)
-    instruction_sentences = instructions.split('. ')
-    l = 0
-    r = 1
-    while r < len(instruction_sentences):
-        sentence = instruction_sentences[r] + '.'
-        if is_imperative(sentence):
-            raw_steps.append('. '.join(instruction_sentences[l:r]) + '.')
-            l = r
-        r = r + 1
-    raw_steps.append('. '.join(instruction_sentences[l:r]))
+    raw_steps = segment_instructions([instructions], batch_size, tier)[0]
+    if step_cache is None:
+        return annotate_steps(raw_steps, ingredients, name)
+
+    steps = step_cache.get_steps(raw_steps, ingredients, name)
+    missed = [i for i, step in enumerate(steps) if step is None]
+    if missed:
+        missed_raw_steps = [raw_steps[i] for i in missed]
+        annotated = annotate_steps(missed_raw_steps, ingredients, name)
+        for i, step in zip(missed, annotated):
+            steps[i] = step
+        step_cache.put_steps(missed_raw_steps, annotated, ingredients, name)
+    return steps
 
+
+@profiled('annotate_steps')
+def annotate_steps(raw_steps, ingredients, name):
+    """
+    Annotates raw steps.
+
+    Args:
+        raw_steps: Raw steps as segmented from the instructions.
+        ingredients: List of ingredients for recipe.
+        name: Name of recipe.
+
+    Returns:
+        List of steps.
+    """
+    matcher = IngredientMatcher(ingredients)
     steps = []
     for raw_step in raw_steps:
-        actions = get_verbs(raw_step)
-        main_action = get_main_action(raw_step, actions)
-        step_ingredients = extract_ingredients_from_step(raw_step, ingredients)
-        tools = extract_tools(raw_step, ingredients, name)
+        # Parse each step once and share the annotations across extractors
+        doc = parse(raw_step, STEP_ANNOTATORS)
+        actions = get_verbs(doc)
+        main_action = get_main_action(doc, actions)
+        step_ingredients = extract_ingredients_from_step(doc, matcher)
+        tools = extract_tools(doc, matcher, name)
         temperature_parameters, processed_step = extract_temperature_parameters(
             raw_step)
         parameters = {
-            'time': extract_time_parameters(raw_step),
+            'time': extract_time_parameters(doc),
             'temperature': temperature_parameters
         }
         steps.append(Step(processed_step, actions, main_action, step_ingredients,
-                     tools, parameters))
+                     tools, parameters, extract_quantity_spans(processed_step)))
     return steps
 
 
+@profiled('extract_ingredients')
 def extract_ingredients(raw_ingredients):
     """
     Extracts ingredients from recipe.
@@ -445,7 +614,7 @@ def extract_ingredients(raw_ingredients):
                      if quantity_word_list[0].isnumeric()
                      else float(quantity_word_list[0]))
 
-                doc = nlp(quantity)
+                doc = parse(quantity, ['quantity'])
 
                 # Multiple tokens in format of '<QUANTITY> <DESCRIPTORS>'
                 if doc[1].pos_ in ['ADJ', 'ADV', 'VERB']:
@@ -474,6 +643,7 @@ def extract_ingredients(raw_ingredients):
     return ingredients
 
 
+@profiled('compile_tools')
 def compile_tools(steps):
     """
     Compiles the tools used from each step.
@@ -493,19 +663,23 @@ def compile_tools(steps):
     return tools
 
 
-def extract(raw_recipe):
+@profiled('extract')
+def extract(raw_recipe, step_cache=None, tier=None):
     """
     Extracts name, steps with annotations, ingredients, and tools from the recipe.
 
     Args:
         raw_recipe: Dictionary representing recipe to extract from.
+        step_cache: Cache of previously extracted steps, if any. Only steps that miss it are parsed.
+        tier: One of EXTRACTION_TIERS to segment steps with. Defaults to EXTRACTION_TIER.
 
     Returns:
         Tuple of recipe name, steps with annotations, ingredients, and tools.
     """
     name = raw_recipe['name']
     ingredients = extract_ingredients(raw_recipe['ingredients'])
-    steps = extract_steps(raw_recipe['instructions'], ingredients, name)
+    steps = extract_steps(raw_recipe['instructions'], ingredients, name,
+                          step_cache=step_cache, tier=tier)
     tools = compile_tools(steps)
 
     return name, steps, ingredients, tools
@@ -0,0 +1,338 @@
+"""This file provides an inverted index from ingredients and tools to the recipes and steps that use them."""
+
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+import argparse
+import json
+import re
+import sqlite3
+import sys
+
+DEFAULT_INDEX_PATH = 'index.sqlite3'
+
+# Step postings pack the recipe number above the step index
+STEP_BITS = 16
+
+# Posting lists are intersected by galloping when one is at least this many
+# times longer than the other. Lists of similar length are intersected faster
+# by hashing in CPython.
+GALLOP_RATIO = 16
+
+INGREDIENT = 'ingredient'
+TOOL = 'tool'
+
+
+def normalize(text):
+    """
+    Normalizes an ingredient or tool name so different spellings map to the same term.
+
+    Args:
+        text: Ingredient or tool name.
+
+    Returns:
+        Lowercase words without punctuation or plural 's', separated by single spaces.
+    """
+    words = re.findall(r'[a-z0-9]+', text.lower())
+    return ' '.join(w[:-1] if len(w) > 3 and w.endswith('s') and not w.endswith('ss') else w
+                    for w in words)
+
+
+def get_terms(kind, name):
+    """
+    Gets the terms a name is indexed under: the whole name and each of its words.
+
+    Args:
+        kind: INGREDIENT or TOOL.
+        name: Ingredient or tool name.
+
+    Returns:
+        Set of terms.
+    """
+    normalized = normalize(name)
+    if not normalized:
+        return set()
+    return {f'{kind}:{normalized}'} | {f'{kind}:{word}' for word in normalized.split()}
+
+
+def intersect(a, b):
+    """
+    Intersects two sorted posting lists, galloping through the longer one if the other is much shorter.
+
+    Args:
+        a: Sorted posting list.
+        b: Sorted posting list.
+
+    Returns:
+        Sorted list of postings in both.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) < GALLOP_RATIO * len(a):
+        return sorted(set(a).intersection(b))
+    result = []
+    lo = 0
+    n = len(b)
+    for x in a:
+        # Double the step until past x, then binary search within the last step
+        step = 1
+        hi = lo
+        while hi < n and b[hi] < x:
+            lo = hi
+            hi += step
+            step *= 2
+        lo = bisect_left(b, x, lo, min(hi + 1, n))
+        if lo == n:
+            break
+        if b[lo] == x:
+            result.append(x)
+    return result
+
+
+def union(posting_lists):
+    """
+    Merges posting lists.
+
+    Hashing and sorting the result is faster in CPython than a k-way merge of
+    the sorted lists.
+
+    Args:
+        posting_lists: Posting lists.
+
+    Returns:
+        Sorted list of postings in any of them.
+    """
+    return sorted(set().union(*posting_lists))
+
+
+class InvertedIndex:
+    """
+    Class representing an on-disk inverted index over parsed recipes.
+
+    Each term has a sorted posting list of recipe numbers and one of steps,
+    stored as packed arrays. Posting lists and recipe names are cached in
+    memory once read.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self.postings = {}
+        self.recipes = None
+        with self.connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS recipes ('
+                               'number INTEGER PRIMARY KEY, id TEXT, name TEXT NOT NULL)')
+            connection.execute('CREATE TABLE IF NOT EXISTS postings ('
+                               'term TEXT PRIMARY KEY, recipes BLOB NOT NULL, steps BLOB NOT NULL)')
+
+    @contextmanager
+    def connect(self):
+        """
+        Opens a connection that commits on success and is always closed.
+        """
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def build(self, records):
+        """
+        Replaces the index with one over parsed recipes.
+
+        Args:
+            records: Iterable of parsed recipes as dictionaries, as written by bulk.py.
+                Recipes that failed to extract are skipped.
+
+        Returns:
+            Number of recipes indexed.
+        """
+        recipe_postings = {}
+        step_postings = {}
+        recipes = []
+        terms_of = {}
+
+        def get_cached_terms(kind, name):
+            # The same few names repeat across a whole catalog
+            if (kind, name) not in terms_of:
+                terms_of[kind, name] = get_terms(kind, name)
+            return terms_of[kind, name]
+
+        for record in records:
+            if 'error' in record:
+                continue
+            number = len(recipes)
+            recipes.append((number, record.get('id'), record['name']))
+
+            ingredient_names = [i['name'] for i in record['ingredients']]
+            for name in ingredient_names:
+                for term in get_cached_terms(INGREDIENT, name):
+                    recipe_postings.setdefault(term, set()).add(number)
+            for name in record['tools']:
+                for term in get_cached_terms(TOOL, name):
+                    recipe_postings.setdefault(term, set()).add(number)
+
+            for i, step in enumerate(record['steps']):
+                posting = (number << STEP_BITS) | i
+                terms = set()
+                for j in step['ingredients']:
+                    terms |= get_cached_terms(INGREDIENT, ingredient_names[j])
+                for name in step['tools']:
+                    terms |= get_cached_terms(TOOL, name)
+                for term in terms:
+                    step_postings.setdefault(term, []).append(posting)
+
+        with self.connect() as connection:
+            connection.execute('DELETE FROM recipes')
+            connection.execute('DELETE FROM postings')
+            connection.executemany(
+                'INSERT INTO recipes VALUES (?, ?, ?)', recipes)
+            connection.executemany('INSERT INTO postings VALUES (?, ?, ?)', (
+                (term, array('I', sorted(numbers)).tobytes(),
+                 array('Q', step_postings.get(term, [])).tobytes())
+                for term, numbers in recipe_postings.items()))
+        self.postings.clear()
+        self.recipes = None
+        return len(recipes)
+
+    def get_postings(self, term):
+        """
+        Gets the posting lists of a term.
+
+        Args:
+            term: Term as returned by get_terms.
+
+        Returns:
+            Tuple of sorted arrays of recipe numbers and of steps.
+        """
+        if term not in self.postings:
+            with self.connect() as connection:
+                row = connection.execute(
+                    'SELECT recipes, steps FROM postings WHERE term = ?', (term,)).fetchone()
+            recipes, steps = array('I'), array('Q')
+            if row:
+                recipes.frombytes(row[0])
+                steps.frombytes(row[1])
+            self.postings[term] = recipes, steps
+        return self.postings[term]
+
+    def get_query_terms(self, ingredients=(), tools=()):
+        terms = [f'{INGREDIENT}:{normalize(name)}' for name in ingredients]
+        terms += [f'{TOOL}:{normalize(name)}' for name in tools]
+        return terms
+
+    def match(self, terms, match_all, postings_of):
+        posting_lists = [postings_of(self.get_postings(term))
+                         for term in terms]
+        if not posting_lists:
+            return []
+        if not match_all:
+            return union(posting_lists)
+        # Intersecting the shortest lists first keeps intermediate results small
+        posting_lists.sort(key=len)
+        result = posting_lists[0]
+        for postings in posting_lists[1:]:
+            if not result:
+                break
+            result = intersect(result, postings)
+        return list(result)
+
+    def find_recipes(self, ingredients=(), tools=(), match_all=True):
+        """
+        Finds recipes that use the ingredients and tools.
+
+        Args:
+            ingredients: Ingredient names.
+            tools: Tool names.
+            match_all: Whether a recipe must use all of them rather than any.
+
+        Returns:
+            List of tuples representing recipe ID and name, in index order.
+        """
+        numbers = self.match(self.get_query_terms(ingredients, tools), match_all,
+                             lambda postings: postings[0])
+        return self.get_recipes(numbers)
+
+    def find_steps(self, ingredients=(), tools=(), match_all=True):
+        """
+        Finds steps that use the ingredients and tools.
+
+        Args:
+            ingredients: Ingredient names.
+            tools: Tool names.
+            match_all: Whether a step must use all of them rather than any.
+
+        Returns:
+            List of tuples representing recipe ID, recipe name and step index, in index order.
+        """
+        steps = self.match(self.get_query_terms(ingredients, tools), match_all,
+                           lambda postings: postings[1])
+        recipes = self.get_recipes([s >> STEP_BITS for s in steps])
+        mask = (1 << STEP_BITS) - 1
+        return [recipe + (s & mask,) for recipe, s in zip(recipes, steps)]
+
+    def get_recipes(self, numbers):
+        """
+        Looks up the ID and name of recipes by number.
+
+        Args:
+            numbers: Recipe numbers.
+
+        Returns:
+            List of tuples representing recipe ID and name.
+        """
+        if self.recipes is None:
+            with self.connect() as connection:
+                self.recipes = connection.execute(
+                    'SELECT id, name FROM recipes ORDER BY number').fetchall()
+        return [self.recipes[number] for number in numbers]
+
+
+def read_records(paths):
+    """
+    Reads parsed recipes from JSONL files written by bulk.py.
+    """
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH,
+                        help=f'Path to the index (default: {DEFAULT_INDEX_PATH})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser(
+        'build', help='Build the index from parsed recipes')
+    build_parser.add_argument('inputs', nargs='+',
+                              help='JSONL files with parsed recipes, as written by bulk.py')
+    query_parser = subparsers.add_parser(
+        'query', help='Find recipes by ingredients and tools')
+    query_parser.add_argument('-i', '--ingredient', action='append', default=[],
+                              help='Ingredient the recipe must use. Can be repeated.')
+    query_parser.add_argument('-t', '--tool', action='append', default=[],
+                              help='Tool the recipe must use. Can be repeated.')
+    query_parser.add_argument('--any', action='store_true',
+                              help='Find recipes that use any rather than all of the ingredients and tools')
+    query_parser.add_argument('--steps', action='store_true',
+                              help='Find steps instead of recipes')
+    args = parser.parse_args()
+
+    index = InvertedIndex(args.index)
+    if args.command == 'build':
+        count = index.build(read_records(args.inputs))
+        print(f'Indexed {count} recipes', file=sys.stderr)
+        return
+
+    if args.steps:
+        for id, name, i in index.find_steps(args.ingredient, args.tool, not args.any):
+            print(f'{id}\t{name}\tstep {i + 1}')
+    else:
+        for id, name in index.find_recipes(args.ingredient, args.tool, not args.any):
+            print(f'{id}\t{name}')
+
+
+if __name__ == '__main__':
+    main()
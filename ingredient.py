@@ -1,19 +1,31 @@
+from bisect import bisect_right
+from collections import defaultdict
+import sys
+
 import editdistance
 
+from profiling import profiled
+from units import convert_imperial_to_metric, convert_metric_to_imperial
+
 
 class Ingredient:
     """
     Class representing an ingredient.
+
+    Names, measurements and descriptors are interned, since the same few strings
+    repeat across a whole catalog of recipes.
     """
 
+    __slots__ = ('name', 'quantity', 'measurement', 'descriptors')
+
     COUNTABLE_MEASUREMENT = 'COUNTS'
     NO_QUANTITY = -1
 
     def __init__(self, name, quantity, measurement, descriptors):
-        self.name = name
+        self.name = sys.intern(name)
         self.quantity = quantity
-        self.measurement = measurement
-        self.descriptors = descriptors
+        self.measurement = sys.intern(measurement)
+        self.descriptors = tuple(sys.intern(d) for d in descriptors)
 
     def is_similar(self, str):
         """
@@ -34,11 +46,196 @@ class Ingredient:
     def has_no_quantity(self):
         return self.quantity == Ingredient.NO_QUANTITY
 
+    def get_transformed_quantity(self, target_unit, ratio):
+        """
+        Computes the quantity of this ingredient with units converted and quantity translated.
+
+        Args:
+            target_unit: Target unit, or None to keep the original unit. Valid units are 'METRIC' and 'IMPERIAL'.
+            ratio: Ratio to translate the quantity by.
+
+        Returns:
+            Tuple representing transformed quantity and measurement.
+        """
+        quantity, measurement = self.quantity, self.measurement
+        if self.has_no_quantity():
+            return quantity, measurement
+        if ratio != 1:
+            quantity = quantity * ratio
+        if self.is_countable():
+            return quantity, measurement
+        if target_unit == 'METRIC':
+            return convert_imperial_to_metric(quantity, measurement)
+        if target_unit == 'IMPERIAL':
+            return convert_metric_to_imperial(quantity, measurement)
+        return quantity, measurement
+
+    def to_dict(self):
+        """
+        Converts this ingredient into a JSON-serializable dictionary.
+        """
+        return {
+            'name': self.name,
+            'quantity': self.quantity,
+            'measurement': self.measurement,
+            'descriptors': self.descriptors
+        }
+
+    @staticmethod
+    def from_dict(data):
+        """
+        Creates an ingredient from a dictionary returned by to_dict.
+        """
+        return Ingredient(data['name'], data['quantity'], data['measurement'], data['descriptors'])
+
     def __repr__(self):
-        descriptors_str = ', ' + ' and '.join(
-            self.descriptors) if self.descriptors else ''
-        if self.quantity == Ingredient.NO_QUANTITY:
-            return f'{self.name}{descriptors_str}'
-        if self.measurement == Ingredient.COUNTABLE_MEASUREMENT:
-            return f'{self.quantity} {self.name}{descriptors_str}'
-        return f'{self.quantity} {self.measurement} of {self.name}{descriptors_str}'
+        return format_ingredient(self.name, self.quantity, self.measurement, self.descriptors)
+
+
+class IngredientView:
+    """
+    Class representing an ingredient with units converted and quantity translated.
+
+    The ingredient itself is not changed. The transformed quantity is computed
+    from the original quantity on first use.
+    """
+
+    __slots__ = ('ingredient', 'target_unit', 'ratio', 'transformed_quantity')
+
+    def __init__(self, ingredient, target_unit=None, ratio=1):
+        self.ingredient = ingredient
+        self.target_unit = target_unit
+        self.ratio = ratio
+        self.transformed_quantity = None
+
+    @property
+    def name(self):
+        return self.ingredient.name
+
+    @property
+    def descriptors(self):
+        return self.ingredient.descriptors
+
+    @property
+    def quantity(self):
+        return self.get_transformed_quantity()[0]
+
+    @property
+    def measurement(self):
+        return self.get_transformed_quantity()[1]
+
+    def get_transformed_quantity(self):
+        if self.transformed_quantity is None:
+            self.transformed_quantity = self.ingredient.get_transformed_quantity(
+                self.target_unit, self.ratio)
+        return self.transformed_quantity
+
+    def is_countable(self):
+        return self.ingredient.is_countable()
+
+    def has_no_quantity(self):
+        return self.ingredient.has_no_quantity()
+
+    def __repr__(self):
+        return format_ingredient(self.name, self.quantity, self.measurement, self.descriptors)
+
+
+def format_ingredient(name, quantity, measurement, descriptors):
+    """
+    Formats an ingredient for display.
+    """
+    descriptors_str = ', ' + ' and '.join(
+        descriptors) if descriptors else ''
+    if quantity == Ingredient.NO_QUANTITY:
+        return f'{name}{descriptors_str}'
+    if measurement == Ingredient.COUNTABLE_MEASUREMENT:
+        return f'{quantity} {name}{descriptors_str}'
+    return f'{quantity} {measurement} of {name}{descriptors_str}'
+
+
+class IngredientMatcher:
+    """
+    Class representing an index over a recipe's ingredients for finding similar ingredients.
+
+    It returns the same matches as checking Ingredient.is_similar on each
+    ingredient in order, without computing the edit distance to every name.
+    Substring matches are found with a single search over the concatenated
+    names. Names within edit distance 1 must share a variant with at most one
+    character deleted, so only names that share one are compared.
+    """
+
+    SEPARATOR = '\x00'
+
+    @profiled('matcher.index')
+    def __init__(self, ingredients):
+        self.ingredients = ingredients
+        self.names = [ingredient.name for ingredient in ingredients]
+        self.haystack = IngredientMatcher.SEPARATOR.join(self.names)
+
+        self.offsets = []
+        offset = 0
+        for name in self.names:
+            self.offsets.append(offset)
+            offset += len(name) + len(IngredientMatcher.SEPARATOR)
+
+        self.deletion_index = defaultdict(list)
+        for i, name in enumerate(self.names):
+            for variant in get_deletion_variants(name):
+                self.deletion_index[variant].append(i)
+
+        self.matches = {}
+
+    def match(self, str):
+        """
+        Finds the first ingredient whose name is similar to given string.
+
+        Args:
+            str: String to check similarity with.
+
+        Returns:
+            First similar ingredient, or None if no ingredient is similar.
+        """
+        if str not in self.matches:
+            i = self.find_first_similar(str)
+            self.matches[str] = None if i is None else self.ingredients[i]
+        return self.matches[str]
+
+    def is_similar_to_any(self, str):
+        return self.match(str) is not None
+
+    @profiled('matcher')
+    def find_first_similar(self, str):
+        """
+        Finds the index of the first ingredient whose name is similar to given string.
+        """
+        if not self.names:
+            return None
+
+        first = None
+        if IngredientMatcher.SEPARATOR in str:
+            first = next((i for i, name in enumerate(self.names)
+                          if str in name), None)
+        else:
+            position = self.haystack.find(str)
+            if position != -1:
+                first = bisect_right(self.offsets, position) - 1
+
+        candidates = set()
+        for variant in get_deletion_variants(str):
+            candidates.update(self.deletion_index.get(variant, ()))
+        for i in sorted(candidates):
+            if first is not None and i >= first:
+                break
+            if editdistance.eval(str, self.names[i]) < 2:
+                return i
+        return first
+
+
+def get_deletion_variants(str):
+    """
+    Gets the string itself and every variant of it with one character deleted.
+    """
+    variants = {str}
+    for i in range(len(str)):
+        variants.add(str[:i] + str[i + 1:])
+    return variants
@@ -0,0 +1,93 @@
+"""This file provides operations to recognize the intent of a user's query."""
+
+import re
+
+# Intents in priority order. A query has the first intent whose pattern it
+# contains, or that it equals for exact intents. Named groups are arguments.
+# Exact patterns are plain text.
+INTENTS = [
+    ('help', 'help', True),
+    ('quit', 'quit', True),
+    ('repeat', 'repeat', False),
+    ('next', 'next', False),
+    ('previous', 'go back', False),
+    ('step', r'step (?P<number>\d+)', False),
+    ('steps', 'show all steps', False),
+    ('ingredients', 'show all ingredients', False),
+    ('tools', 'show all tools', False),
+    ('tool_step', r'when do i need the (?P<tool>[\w|\s]+)', False),
+    ('vague_how_to', 'how do i do that', False),
+    ('how_to', 'how do i|how to', False),
+    ('what_is', 'what is a', False),
+    ('step_ingredients', 'what ingredients do i need', False),
+    ('step_tools', 'what tools do i need', False),
+    ('time', 'how long', False),
+    ('temperature', 'what temperature', False),
+    ('convert_units', 'convert units', False),
+    ('translate_portion_size', 'translate portion size', False),
+]
+
+UNKNOWN_INTENT = 'unknown'
+
+
+class Intent:
+    """
+    Class representing the intent of a user's query.
+    """
+
+    def __init__(self, name, args, text):
+        self.name = name
+        self.args = args
+        self.text = text
+
+    def __repr__(self):
+        return f'Intent({self.name}, {self.args})'
+
+
+def compile_intents(intents):
+    """
+    Compiles intents into matchers that are tried in priority order.
+
+    Patterns without special characters are matched with plain substring tests,
+    which are much cheaper than running the regex engine, and the rest are
+    compiled once.
+
+    Args:
+        intents: List of tuples representing intent name, pattern, and whether the query must equal the pattern.
+
+    Returns:
+        List of tuples representing intent name, literal to test for or None, compiled pattern or None,
+        whether the query must equal the literal, and argument names.
+    """
+    matchers = []
+    for name, pattern, exact in intents:
+        if exact or re.escape(pattern).replace('\\ ', ' ') == pattern:
+            matchers.append((name, pattern, None, exact, []))
+        else:
+            compiled = re.compile(pattern)
+            matchers.append((name, None, compiled, False, list(compiled.groupindex)))
+    return matchers
+
+
+INTENT_MATCHERS = compile_intents(INTENTS)
+
+
+def parse_intent(query):
+    """
+    Finds the intent of a query.
+
+    Args:
+        query: User's query in lowercase.
+
+    Returns:
+        Intent of the query, named UNKNOWN_INTENT if no intent matches.
+    """
+    for name, literal, pattern, exact, arg_names in INTENT_MATCHERS:
+        if pattern is None:
+            if query == literal if exact else literal in query:
+                return Intent(name, {}, query)
+            continue
+        m = pattern.search(query)
+        if m:
+            return Intent(name, {arg: m.group(arg) for arg in arg_names}, query)
+    return Intent(UNKNOWN_INTENT, {}, query)
@@ -1,11 +1,38 @@
 """This file serves as the entry point of the program."""
 
+import argparse
+import sys
+
 from bot import Bot
+from cache import RecipeCache
+from crawler import Mirror
+import profiling
+from search import RecipeSearch
 
 
 def main():
-    bot = Bot()
-    bot.start()
+    parser = argparse.ArgumentParser(description='Interactive cookbook')
+    parser.add_argument('--mirror',
+                        help='Path to a local mirror of TheMealDB to fetch recipes from before the API')
+    parser.add_argument('--profile', action='store_true',
+                        help='Show the time spent in each extraction stage on exit')
+    parser.add_argument('--profile-collapsed',
+                        help='File to write the profiled stages to as collapsed stacks for flamegraphs')
+    args = parser.parse_args()
+
+    if args.profile or args.profile_collapsed:
+        profiling.enable()
+    mirror = Mirror(args.mirror) if args.mirror else None
+    search = RecipeSearch.from_mirror(mirror) if mirror else None
+    bot = Bot(RecipeCache(), mirror, search=search)
+    try:
+        bot.start()
+    finally:
+        if args.profile:
+            print(profiling.format_stats(), file=sys.stderr)
+        if args.profile_collapsed:
+            with open(args.profile_collapsed, 'w', encoding='utf-8') as f:
+                f.write(profiling.format_collapsed_stacks() + '\n')
 
 
 if __name__ == '__main__':
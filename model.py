@@ -0,0 +1,115 @@
+"""This file provides operations to load the spaCy model lazily."""
+
+from importlib import metadata
+import os
+
+from profiling import profiled, profiled_iter
+import profiling
+
+# Name of the spaCy model to load. en_core_web_sm is smaller and faster to load
+# as it has no word vectors.
+MODEL_NAME = os.environ.get('COOKBOOK_SPACY_MODEL', 'en_core_web_md')
+
+# Components of the en_core_web_* pipelines
+MODEL_PIPES = ('tok2vec', 'tagger', 'parser', 'attribute_ruler',
+               'lemmatizer', 'ner', 'senter')
+
+# Pipeline components needed by each annotator. Components that no annotator
+# needs are excluded when the model is loaded.
+ANNOTATOR_PIPES = {
+    'imperative': ('tok2vec', 'tagger', 'attribute_ruler'),
+    'verbs': ('tok2vec', 'tagger'),
+    'main_action': ('tok2vec', 'parser'),
+    'noun_compounds': ('tok2vec', 'tagger', 'attribute_ruler', 'parser'),
+    'tools': ('tok2vec', 'parser'),
+    'time': ('tok2vec', 'tagger', 'parser', 'ner'),
+    'quantity': ('tok2vec', 'tagger', 'attribute_ruler'),
+}
+
+# Annotators that run on the shared parse of each step
+STEP_ANNOTATORS = ('verbs', 'main_action', 'noun_compounds', 'tools', 'time')
+
+_nlp = None
+
+
+def get_nlp():
+    """
+    Gets the spaCy model, loading it on first use.
+
+    Returns:
+        Loaded spaCy model.
+    """
+    global _nlp
+    if _nlp is None:
+        import spacy
+
+        required = set()
+        for pipes in ANNOTATOR_PIPES.values():
+            required.update(pipes)
+        excluded = [pipe for pipe in MODEL_PIPES if pipe not in required]
+        _nlp = spacy.load(MODEL_NAME, exclude=excluded)
+    return _nlp
+
+
+def get_model_version():
+    """
+    Gets the installed version of the spaCy model without loading it.
+
+    Returns:
+        Version string, or 'unknown' if the model is not installed as a package.
+    """
+    try:
+        return metadata.version(MODEL_NAME)
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+def get_disabled_pipes(annotators):
+    """
+    Gets the loaded pipeline components that the annotators do not need.
+
+    Args:
+        annotators: Names of annotators in ANNOTATOR_PIPES.
+
+    Returns:
+        List of component names to disable.
+    """
+    required = set()
+    for annotator in annotators:
+        required.update(ANNOTATOR_PIPES[annotator])
+    return [pipe for pipe in get_nlp().pipe_names if pipe not in required]
+
+
+@profiled('nlp', texts_arg=0)
+def parse(text, annotators):
+    """
+    Parses text with the components needed by the annotators.
+
+    Args:
+        text: Text to parse.
+        annotators: Names of annotators that will read the parse.
+
+    Returns:
+        Parsed Doc.
+    """
+    return get_nlp()(text, disable=get_disabled_pipes(annotators))
+
+
+@profiled('nlp.pipe.setup', texts_arg=0)
+def parse_many(texts, annotators, batch_size):
+    """
+    Parses texts in batches with the components needed by the annotators.
+
+    Args:
+        texts: Texts to parse.
+        annotators: Names of annotators that will read the parses.
+        batch_size: Number of texts to parse at a time.
+
+    Returns:
+        Iterator of parsed Docs, in the same order as texts.
+    """
+    docs = get_nlp().pipe(texts, batch_size=batch_size,
+                          disable=get_disabled_pipes(annotators))
+    # The texts are parsed as the docs are consumed, after this returns, so
+    # parsing is profiled as 'nlp.pipe' apart from setting up the pipe
+    return profiled_iter('nlp.pipe', docs) if profiling.ENABLED else docs
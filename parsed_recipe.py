@@ -1,4 +1,7 @@
-from units import convert_imperial_to_metric, convert_metric_to_imperial
+import sys
+
+from ingredient import Ingredient, IngredientView
+from step import Step, StepView
 
 
 class ParsedRecipe:
@@ -6,11 +9,13 @@ class ParsedRecipe:
     Class representing a parsed recipe.
     """
 
+    __slots__ = ('name', 'steps', 'ingredients', 'tools')
+
     def __init__(self, name, steps, ingredients, tools):
         self.name = name
-        self.steps = steps
-        self.ingredients = ingredients
-        self.tools = tools
+        self.steps = tuple(steps)
+        self.ingredients = tuple(ingredients)
+        self.tools = {sys.intern(tool): i for tool, i in tools.items()}
 
     def get_number_of_steps(self):
         return len(self.steps)
@@ -48,20 +53,11 @@ class ParsedRecipe:
 
         Args:
             target_unit: Target unit. Valid units are 'METRIC' and 'IMPERIAL'.
+
+        Returns:
+            View of this recipe with converted units. This recipe is not changed.
         """
-        if target_unit != 'METRIC' and target_unit != 'IMPERIAL':
-            return
-        for i in self.ingredients:
-            if i.has_no_quantity() or i.is_countable():
-                continue
-            if target_unit == 'METRIC':
-                i.quantity, i.measurement = convert_imperial_to_metric(
-                    i.quantity, i.measurement)
-            elif target_unit == 'IMPERIAL':
-                i.quantity, i.measurement = convert_metric_to_imperial(
-                    i.quantity, i.measurement)
-        for i in self.steps:
-            i.convert_units(target_unit)
+        return RecipeView(self).convert_units(target_unit)
 
     def translate_portion_size(self, ratio):
         """
@@ -69,20 +65,130 @@ class ParsedRecipe:
 
         Args:
             ratio: Ratio to translate by.
+
+        Returns:
+            View of this recipe with translated quantities. This recipe is not changed.
+        """
+        return RecipeView(self).translate_portion_size(ratio)
+
+    def to_dict(self):
+        """
+        Converts this recipe into a JSON-serializable dictionary.
+        """
+        return {
+            'name': self.name,
+            'steps': [step.to_dict(self.ingredients) for step in self.steps],
+            'ingredients': [ingredient.to_dict() for ingredient in self.ingredients],
+            'tools': self.tools
+        }
+
+    @staticmethod
+    def from_dict(data):
+        """
+        Creates a recipe from a dictionary returned by to_dict.
+        """
+        ingredients = [Ingredient.from_dict(i) for i in data['ingredients']]
+        steps = [Step.from_dict(s, ingredients) for s in data['steps']]
+        return ParsedRecipe(data['name'], steps, ingredients, data['tools'])
+
+    def __repr__(self):
+        return format_steps(self.steps)
+
+
+class RecipeView:
+    """
+    Class representing a parsed recipe with units converted and quantities translated.
+
+    The recipe itself is not changed, and the view shares its steps and
+    ingredients. Transformed ingredients and steps are computed on first use.
+    """
+
+    __slots__ = ('recipe', 'name', 'target_unit', 'ratio', 'ingredient_views', 'step_views')
+
+    def __init__(self, recipe, target_unit=None, ratio=1):
+        self.recipe = recipe
+        self.name = recipe.name
+        self.target_unit = target_unit
+        self.ratio = ratio
+        self.ingredient_views = None
+        self.step_views = {}
+
+    def get_number_of_steps(self):
+        return self.recipe.get_number_of_steps()
+
+    def get_ingredients(self):
+        if self.ingredient_views is None:
+            self.ingredient_views = tuple(IngredientView(i, self.target_unit, self.ratio)
+                                          for i in self.recipe.get_ingredients())
+        return self.ingredient_views
+
+    def get_tools(self):
+        return self.recipe.get_tools()
+
+    def get_step(self, i):
+        """
+        Gets the i-th step of the recipe.
+
+        Args:
+            i: Index of step to retrieve.
+
+        Returns:
+            View of the i-th step of the recipe.
+
+        Raises:
+            ValueError: If i is None.
+            IndexError: If i is out of bounds.
+        """
+        if i not in self.step_views:
+            self.step_views[i] = StepView(
+                self.recipe.get_step(i), self.target_unit, self.ratio)
+        return self.step_views[i]
+
+    def convert_units(self, target_unit):
+        """
+        Converts the units in this view to the target unit.
+
+        Args:
+            target_unit: Target unit. Valid units are 'METRIC' and 'IMPERIAL'.
+
+        Returns:
+            New view with converted units, or this view if the target unit is invalid.
+        """
+        if target_unit != 'METRIC' and target_unit != 'IMPERIAL':
+            return self
+        return RecipeView(self.recipe, target_unit, self.ratio)
+
+    def translate_portion_size(self, ratio):
+        """
+        Translates the ingredient quantities in this view by a ratio.
+
+        Args:
+            ratio: Ratio to translate by.
+
+        Returns:
+            New view with translated quantities, or this view if the ratio is invalid.
         """
         if not isinstance(ratio, float) and not isinstance(ratio, int):
-            return
+            return self
         if ratio == 1:
-            return
-        for i in self.ingredients:
-            if i.has_no_quantity():
-                continue
-            i.quantity = i.quantity * ratio
-        for i in self.steps:
-            i.translate_portion_size(ratio)
+            return self
+        return RecipeView(self.recipe, self.target_unit, self.ratio * ratio)
 
     def __repr__(self):
-        s = ''
-        for i, step in enumerate(self.steps):
-            s += f'Step {i + 1}: {step}\n'
-        return s.strip()
+        return format_steps(self.get_step(i) for i in range(self.get_number_of_steps()))
+
+
+def format_steps(steps):
+    """
+    Formats steps as numbered lines.
+
+    Args:
+        steps: Iterable of steps.
+
+    Returns:
+        Numbered steps, one per line.
+    """
+    s = ''
+    for i, step in enumerate(steps):
+        s += f'Step {i + 1}: {step}\n'
+    return s.strip()
@@ -0,0 +1,209 @@
+"""This file provides operations to profile the stages of extraction."""
+
+import functools
+import inspect
+import threading
+import time
+
+# Whether stages are profiled. Profiled functions only check this flag while it is off.
+ENABLED = False
+
+_lock = threading.Lock()
+_local = threading.local()
+_stats = {}
+_stacks = {}
+
+
+class StageStats:
+    """
+    Class representing the time spent in a stage, with the texts it processed.
+
+    Seconds include time spent in nested stages, and self seconds do not.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0
+        self.self_seconds = 0
+        self.texts = 0
+        self.chars = 0
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'seconds': self.seconds,
+            'self_seconds': self.self_seconds,
+            'texts': self.texts,
+            'chars': self.chars
+        }
+
+
+class Frame:
+    """
+    Class representing a stage that is running.
+    """
+
+    def __init__(self, stage, start):
+        self.stage = stage
+        self.start = start
+        self.child_seconds = 0
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    """
+    Clears all recorded stats.
+    """
+    with _lock:
+        _stats.clear()
+        _stacks.clear()
+
+
+def get_stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def enter(stage):
+    stack = get_stack()
+    stack.append(Frame(stage, time.perf_counter()))
+
+
+def leave(calls=1, texts=None):
+    """
+    Records the time spent in the innermost running stage.
+
+    Args:
+        calls: Number of calls to count.
+        texts: Text or list of texts that the stage processed, if any.
+    """
+    stack = get_stack()
+    frame = stack.pop()
+    seconds = time.perf_counter() - frame.start
+    if stack:
+        stack[-1].child_seconds += seconds
+    self_seconds = seconds - frame.child_seconds
+    path = ';'.join([f.stage for f in stack] + [frame.stage])
+
+    with _lock:
+        stats = _stats.get(frame.stage)
+        if stats is None:
+            stats = _stats[frame.stage] = StageStats()
+        stats.calls += calls
+        stats.seconds += seconds
+        stats.self_seconds += self_seconds
+        if isinstance(texts, str):
+            stats.texts += 1
+            stats.chars += len(texts)
+        elif texts is not None:
+            stats.texts += len(texts)
+            stats.chars += sum(len(text) for text in texts)
+        _stacks[path] = _stacks.get(path, 0) + self_seconds
+
+
+def profiled(stage, texts_arg=None):
+    """
+    Decorates a function to be profiled as a stage.
+
+    Args:
+        stage: Name of the stage.
+        texts_arg: Position of the argument holding the text or list of texts that the function processes, if any.
+            The argument may also be passed by keyword.
+
+    Returns:
+        Decorator.
+    """
+    def decorator(f):
+        texts_name = list(inspect.signature(f).parameters)[
+            texts_arg] if texts_arg is not None else None
+
+        def get_texts(args, kwargs):
+            if texts_arg is None:
+                return None
+            return args[texts_arg] if texts_arg < len(args) else kwargs.get(texts_name)
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return f(*args, **kwargs)
+            enter(stage)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                leave(texts=get_texts(args, kwargs))
+        return wrapper
+    return decorator
+
+
+def profiled_iter(stage, iterator):
+    """
+    Profiles the time spent producing each item of a lazy iterator as a stage, without counting calls.
+
+    Args:
+        stage: Name of the stage.
+        iterator: Iterator to profile.
+
+    Yields:
+        Items of the iterator.
+    """
+    while True:
+        enter(stage)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            leave(calls=0)
+        yield item
+
+
+def get_stats():
+    """
+    Gets the stats recorded for each stage.
+
+    Returns:
+        Dictionary with mapping from stage to its calls, seconds, self seconds, texts and characters.
+    """
+    with _lock:
+        return {stage: stats.to_dict() for stage, stats in _stats.items()}
+
+
+def get_collapsed_stacks():
+    """
+    Gets the self time of each stack of stages.
+
+    Returns:
+        Dictionary with mapping from stages joined by ';', outermost first, to seconds.
+    """
+    with _lock:
+        return dict(_stacks)
+
+
+def format_stats():
+    """
+    Formats the recorded stats as a table, slowest stage first.
+    """
+    stats = get_stats()
+    lines = [f'{"stage":>32} {"calls":>8} {"total (ms)":>12} {"self (ms)":>12} {"texts":>8} {"chars":>10}']
+    for stage, s in sorted(stats.items(), key=lambda item: item[1]['seconds'], reverse=True):
+        lines.append(f'{stage:>32} {s["calls"]:>8} {s["seconds"] * 1000:>12.1f} '
+                     f'{s["self_seconds"] * 1000:>12.1f} {s["texts"]:>8} {s["chars"]:>10}')
+    return '\n'.join(lines)
+
+
+def format_collapsed_stacks():
+    """
+    Formats the recorded stacks in the collapsed format read by flamegraph tools, with self time in microseconds.
+    """
+    return '\n'.join(f'{path} {round(seconds * 1e6)}'
+                     for path, seconds in sorted(get_collapsed_stacks().items()))
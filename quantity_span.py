@@ -0,0 +1,78 @@
+import sys
+
+from units import convert_celsius_to_fahrenheit, convert_fahrenheit_to_celsius, convert_imperial_to_metric, convert_metric_to_imperial, is_imperial, is_metric
+
+
+class QuantitySpan:
+    """
+    Class representing a quantity or temperature in the text of a step.
+
+    The span records the original value and unit along with its character
+    offsets into the original text, so transformed text can always be rendered
+    from the original values.
+    """
+
+    __slots__ = ('start', 'end', 'value', 'unit', 'kind')
+
+    QUANTITY = 'QUANTITY'
+    TEMPERATURE = 'TEMPERATURE'
+
+    def __init__(self, start, end, value, unit, kind):
+        self.start = start
+        self.end = end
+        self.value = value
+        self.unit = sys.intern(unit)
+        self.kind = sys.intern(kind)
+
+    def render(self, target_unit, ratio):
+        """
+        Renders this span with units converted and quantities translated.
+
+        Args:
+            target_unit: Target unit, or None to keep the original unit. Valid units are 'METRIC' and 'IMPERIAL'.
+            ratio: Ratio to translate quantities by. Temperatures are not translated.
+
+        Returns:
+            Rendered text, or None if the original text is unchanged.
+        """
+        if self.kind == QuantitySpan.TEMPERATURE:
+            if target_unit == 'IMPERIAL' and self.unit == '°C':
+                converted, unit = convert_celsius_to_fahrenheit(self.value)
+            elif target_unit == 'METRIC' and self.unit == '°F':
+                converted, unit = convert_fahrenheit_to_celsius(self.value)
+            else:
+                return None
+            return str(converted) + unit
+
+        quantity, unit = self.value, self.unit
+        if ratio != 1:
+            quantity = quantity * ratio
+        if target_unit == 'METRIC' and is_imperial(unit):
+            quantity, unit = convert_imperial_to_metric(quantity, unit)
+        elif target_unit == 'IMPERIAL' and is_metric(unit):
+            quantity, unit = convert_metric_to_imperial(quantity, unit)
+        elif ratio == 1:
+            return None
+        return ' '.join([str(quantity), unit])
+
+    def to_dict(self):
+        """
+        Converts this span into a JSON-serializable dictionary.
+        """
+        return {
+            'start': self.start,
+            'end': self.end,
+            'value': self.value,
+            'unit': self.unit,
+            'kind': self.kind
+        }
+
+    @staticmethod
+    def from_dict(data):
+        """
+        Creates a span from a dictionary returned by to_dict.
+        """
+        return QuantitySpan(data['start'], data['end'], data['value'], data['unit'], data['kind'])
+
+    def __repr__(self):
+        return f'{self.kind}({self.value} {self.unit} at {self.start}:{self.end})'
@@ -0,0 +1,168 @@
+"""This file provides a local, typo-tolerant search over mirrored recipes."""
+
+import argparse
+import math
+import re
+import time
+
+import editdistance
+
+from crawler import DEFAULT_MIRROR_PATH, Mirror
+
+# Weight of a term occurrence in each field of a recipe
+FIELD_WEIGHTS = {'name': 3, 'ingredients': 2, 'instructions': 1}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Weight of a query term matched through a typo rather than exactly
+TYPO_WEIGHT = 0.5
+
+
+def tokenize(text):
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+
+def get_trigrams(term):
+    padded = f'${term}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def get_max_typos(term):
+    """
+    Gets the edit distance within which a term is treated as a typo of another.
+    """
+    if len(term) < 4:
+        return 0
+    if len(term) < 8:
+        return 1
+    return 2
+
+
+class RecipeSearch:
+    """
+    Class representing an in-memory search index over recipes.
+
+    Recipes are ranked with BM25 over their name, ingredients and instructions,
+    with occurrences weighted by field. Query terms that are not in any recipe
+    also match terms within a small edit distance, found through shared
+    trigrams, at a lower weight.
+    """
+
+    def __init__(self, recipes):
+        self.ids = []
+        self.names = []
+        self.lengths = []
+        self.postings = {}
+        for recipe in recipes:
+            doc = len(self.ids)
+            self.ids.append(recipe['id'])
+            self.names.append(recipe['name'])
+            weights = {}
+            fields = {
+                'name': recipe['name'],
+                'ingredients': ' '.join(recipe['ingredients']),
+                'instructions': recipe['instructions']
+            }
+            length = 0
+            for field, text in fields.items():
+                for term in tokenize(text):
+                    weights[term] = weights.get(term, 0) + FIELD_WEIGHTS[field]
+                    length += FIELD_WEIGHTS[field]
+            self.lengths.append(length)
+            for term, weight in weights.items():
+                self.postings.setdefault(term, []).append((doc, weight))
+
+        self.average_length = sum(self.lengths) / \
+            len(self.lengths) if self.lengths else 0
+        self.trigram_index = {}
+        for term in self.postings:
+            for trigram in get_trigrams(term):
+                self.trigram_index.setdefault(trigram, []).append(term)
+
+    @staticmethod
+    def from_mirror(mirror):
+        """
+        Creates a search index over every recipe in a mirror.
+        """
+        return RecipeSearch(mirror.iter_recipes())
+
+    def expand(self, term):
+        """
+        Finds the indexed terms that a query term matches.
+
+        Args:
+            term: Query term.
+
+        Returns:
+            Dictionary with mapping from indexed term to the weight of the match.
+        """
+        if term in self.postings:
+            return {term: 1}
+        max_typos = get_max_typos(term)
+        if not max_typos:
+            return {}
+
+        # Each edit changes at most 3 trigrams
+        trigrams = get_trigrams(term)
+        shared = {}
+        for trigram in trigrams:
+            for candidate in self.trigram_index.get(trigram, []):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        min_shared = max(1, len(trigrams) - 3 * max_typos)
+        return {candidate: TYPO_WEIGHT for candidate, count in shared.items()
+                if count >= min_shared and abs(len(candidate) - len(term)) <= max_typos
+                and editdistance.eval(term, candidate) <= max_typos}
+
+    def search(self, query, limit=5):
+        """
+        Searches recipes.
+
+        Args:
+            query: Search query.
+            limit: Maximum number of results.
+
+        Returns:
+            List of tuples representing meal ID, recipe name and score, best match first.
+        """
+        n = len(self.ids)
+        scores = {}
+        for term in set(tokenize(query)):
+            for match, match_weight in self.expand(term).items():
+                postings = self.postings[match]
+                idf = math.log(1 + (n - len(postings) + 0.5) /
+                               (len(postings) + 0.5))
+                for doc, weight in postings:
+                    norm = K1 * (1 - B + B *
+                                 self.lengths[doc] / self.average_length)
+                    score = match_weight * idf * \
+                        weight * (K1 + 1) / (weight + norm)
+                    scores[doc] = scores.get(doc, 0) + score
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.ids[doc], self.names[doc], score) for doc, score in ranked[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('query', help='Search query')
+    parser.add_argument('--mirror', default=DEFAULT_MIRROR_PATH,
+                        help=f'Path to the mirror (default: {DEFAULT_MIRROR_PATH})')
+    parser.add_argument('-n', '--limit', type=int, default=5,
+                        help='Maximum number of results')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    search = RecipeSearch.from_mirror(Mirror(args.mirror))
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    results = search.search(args.query, args.limit)
+    searched = time.perf_counter() - start
+    for id, name, score in results:
+        print(f'{id}\t{name}\t{score:.2f}')
+    print(f'Indexed {len(search.ids)} recipes in {built * 1000:.0f} ms, '
+          f'searched in {searched * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
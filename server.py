@@ -0,0 +1,229 @@
+"""This file provides a server that hosts many cookbook sessions over TCP."""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import argparse
+import asyncio
+import queue
+import sys
+import threading
+
+from bot import Bot
+from bulk import extract_recipe, init_worker
+from cache import RecipeCache, get_recipe_key
+from crawler import Mirror
+from parsed_recipe import ParsedRecipe
+from search import RecipeSearch
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Number of parsed recipes kept in memory for all sessions
+DEFAULT_MEMORY_SIZE = 256
+
+
+class SharedRecipeLoader:
+    """
+    Class representing a recipe cache shared by all sessions of the server.
+
+    Recipes are looked up in memory, then in the on-disk cache, and extracted
+    otherwise. Extraction runs in a separate process that holds the only copy of
+    the spaCy model, so it never holds up the sessions. Sessions that load the
+    same recipe at once wait for a single extraction. Parsed recipes are shared
+    between sessions, which is safe since transformations return views.
+    """
+
+    def __init__(self, cache, extractor, memory_size=DEFAULT_MEMORY_SIZE):
+        self.cache = cache
+        self.extractor = extractor
+        self.memory_size = memory_size
+        self.recipes = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def load(self, raw_recipe):
+        """
+        Gets a parsed recipe, extracting it if no session has loaded it before.
+
+        Args:
+            raw_recipe: Dictionary representing recipe to extract from.
+
+        Returns:
+            Parsed recipe.
+
+        Raises:
+            RuntimeError: If extraction failed.
+        """
+        key = get_recipe_key(raw_recipe, self.cache.version)
+        with self.lock:
+            if key in self.recipes:
+                # Move to the end so the least recently used recipe is evicted first
+                recipe = self.recipes.pop(key)
+                self.recipes[key] = recipe
+                return recipe
+            pending = self.pending.get(key)
+            if pending is None:
+                pending = self.pending[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            pending.wait()
+            with self.lock:
+                recipe = self.recipes.get(key)
+            return recipe if recipe is not None else self.load(raw_recipe)
+
+        try:
+            recipe = self.cache.get(key)
+            if recipe is None:
+                _, _, record = self.extractor.submit(
+                    extract_recipe, raw_recipe).result()
+                if 'error' in record:
+                    raise RuntimeError(record['error'])
+                recipe = ParsedRecipe.from_dict(record)
+                self.cache.put(key, recipe)
+            with self.lock:
+                self.recipes[key] = recipe
+                if len(self.recipes) > self.memory_size:
+                    del self.recipes[next(iter(self.recipes))]
+            return recipe
+        finally:
+            with self.lock:
+                del self.pending[key]
+            pending.set()
+
+
+class Session:
+    """
+    Class representing the connection of one user to the server.
+
+    The user's bot runs in a thread of its own. Lines from the client are passed
+    to the bot through a queue, and replies are written back on the event loop.
+    """
+
+    def __init__(self, reader, writer, loop):
+        self.reader = reader
+        self.writer = writer
+        self.loop = loop
+        self.lines = queue.Queue()
+
+    def input(self, prompt=''):
+        """
+        Shows a prompt and waits for the next line from the client, like input.
+
+        Raises:
+            EOFError: If the client has disconnected.
+        """
+        self.write(prompt)
+        line = self.lines.get()
+        if line is None:
+            raise EOFError
+        return line
+
+    def output(self, text=''):
+        """
+        Shows a reply to the client, like print.
+        """
+        self.write(f'{text}\n')
+
+    def write(self, text):
+        self.loop.call_soon_threadsafe(
+            self.writer.write, text.encode('utf-8'))
+
+    async def read_lines(self):
+        """
+        Passes lines from the client to the bot until the client disconnects.
+        """
+        try:
+            while line := await self.reader.readline():
+                self.lines.put(line.decode('utf-8', 'replace').rstrip('\r\n'))
+        finally:
+            self.lines.put(None)
+
+
+class Server:
+    """
+    Class representing a server that hosts a bot for each connected client.
+
+    Clients that connect while max_sessions sessions are running are told the
+    server is busy and disconnected, rather than left waiting without a prompt.
+    """
+
+    def __init__(self, loader, mirror=None, max_sessions=64):
+        self.loader = loader
+        self.mirror = mirror
+        self.search = RecipeSearch.from_mirror(mirror) if mirror else None
+        self.max_sessions = max_sessions
+        self.active_sessions = 0
+        self.sessions = ThreadPoolExecutor(max_sessions)
+
+    def run_bot(self, session):
+        bot = Bot(self.loader, self.mirror,
+                  session.input, session.output, self.search)
+        try:
+            bot.start()
+        except EOFError:
+            pass
+
+    async def handle(self, reader, writer):
+        """
+        Runs a session for a connected client until the user quits or disconnects.
+        """
+        if self.active_sessions >= self.max_sessions:
+            writer.write(
+                b'Sorry, the server is busy. Please try again later.\n')
+            try:
+                await writer.drain()
+            finally:
+                writer.close()
+            return
+
+        # Sessions are only counted on the event loop, so no lock is needed
+        self.active_sessions += 1
+        loop = asyncio.get_running_loop()
+        session = Session(reader, writer, loop)
+        reading = asyncio.create_task(session.read_lines())
+        try:
+            await loop.run_in_executor(self.sessions, self.run_bot, session)
+        except Exception as e:
+            print(f'Session failed: {e!r}', file=sys.stderr)
+            writer.write(
+                b'Sorry, something went wrong with this session. Goodbye.\n')
+        finally:
+            self.active_sessions -= 1
+            reading.cancel()
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f'Serving on {host}:{port}', file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help=f'Host to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--mirror',
+                        help='Path to a local mirror of TheMealDB to fetch recipes from before the API')
+    parser.add_argument('--max-sessions', type=int, default=64,
+                        help='Maximum number of sessions served at once. Clients beyond it are told the server is busy.')
+    args = parser.parse_args()
+
+    mirror = Mirror(args.mirror) if args.mirror else None
+    cache = RecipeCache()
+    with ProcessPoolExecutor(1, initializer=init_worker, initargs=(
+            cache.path, cache.step_cache.max_bytes)) as extractor:
+        loader = SharedRecipeLoader(cache, extractor)
+        server = Server(loader, mirror, args.max_sessions)
+        try:
+            asyncio.run(server.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,33 @@
-import itertools
-import re
+import sys
 
-from units import convert_celsius_to_fahrenheit, convert_fahrenheit_to_celsius, convert_imperial_to_metric, convert_metric_to_imperial, IMPERIAL_TO_METRIC, METRIC_TO_IMPERIAL
+from quantity_span import QuantitySpan
+from ingredient import IngredientView
+from units import convert_temperatures
 
 
 class Step:
     """
     Class representing a step in the cookbook with annotations. 
+
+    The text is kept as extracted, along with spans marking its quantities and
+    temperatures, so transformed text can be rendered from the original values.
+    Annotations are stored as tuples of interned strings, and ingredients refer
+    to the recipe's own ingredients rather than copies.
     """
 
-    def __init__(self, text, actions, main_action, ingredients, tools, parameters):
+    __slots__ = ('text', 'actions', 'main_action', 'ingredients', 'tools',
+                 'time_parameters', 'temperature_parameters', 'spans')
+
+    def __init__(self, text, actions, main_action, ingredients, tools, parameters, spans):
         self.text = text
-        self.actions = actions
-        self.main_action = main_action
-        self.ingredients = ingredients
-        self.tools = tools
-        self.parameters = parameters
+        self.actions = intern_all(actions)
+        self.main_action = sys.intern(main_action) if main_action else main_action
+        self.ingredients = tuple(ingredients)
+        self.tools = intern_all(tools)
+        self.time_parameters = {sys.intern(action): intern_all(times)
+                                for action, times in parameters['time'].items()}
+        self.temperature_parameters = tuple(parameters['temperature'])
+        self.spans = tuple(spans)
 
     def get_actions(self):
         return self.actions
@@ -30,10 +42,33 @@ class Step:
         return self.tools
 
     def get_time_parameters(self):
-        return self.parameters['time']
+        return self.time_parameters
 
     def get_temperature_parameters(self):
-        return self.parameters['temperature']
+        return self.temperature_parameters
+
+    def render(self, target_unit=None, ratio=1):
+        """
+        Renders the text of this step with units converted and quantities translated.
+
+        Args:
+            target_unit: Target unit, or None to keep the original units. Valid units are 'METRIC' and 'IMPERIAL'.
+            ratio: Ratio to translate quantities by.
+
+        Returns:
+            Rendered text.
+        """
+        pieces = []
+        last = 0
+        for span in self.spans:
+            rendered = span.render(target_unit, ratio)
+            if rendered is None:
+                continue
+            pieces.append(self.text[last:span.start])
+            pieces.append(rendered)
+            last = span.end
+        pieces.append(self.text[last:])
+        return ''.join(pieces)
 
     def convert_units(self, target_unit):
         """
@@ -41,59 +76,146 @@ class Step:
 
         Args:
             target_unit: Target unit. Valid units are 'METRIC' and 'IMPERIAL'.
+
+        Returns:
+            View of this step with converted units. This step is not changed.
         """
-        if target_unit != 'METRIC' and target_unit != 'IMPERIAL':
-            return
+        return StepView(self).convert_units(target_unit)
+
+    def translate_portion_size(self, ratio):
+        """
+        Translates the ingredient portions in this step by a ratio.
+
+        Args:
+            ratio: Ratio to translate by.
+
+        Returns:
+            View of this step with translated portions. This step is not changed.
+        """
+        return StepView(self).translate_portion_size(ratio)
+
+    def to_dict(self, ingredients):
+        """
+        Converts this step into a JSON-serializable dictionary.
+
+        Args:
+            ingredients: List of ingredients for recipe. Ingredients in this step are stored as indices into it.
+        """
+        return {
+            'text': self.text,
+            'actions': self.actions,
+            'main_action': self.main_action,
+            'ingredients': [ingredients.index(i) for i in self.ingredients],
+            'tools': self.tools,
+            'parameters': {
+                'time': self.time_parameters,
+                'temperature': self.temperature_parameters
+            },
+            'spans': [span.to_dict() for span in self.spans]
+        }
+
+    @staticmethod
+    def from_dict(data, ingredients):
+        """
+        Creates a step from a dictionary returned by to_dict.
+
+        Args:
+            data: Dictionary representing the step.
+            ingredients: List of ingredients for recipe that the step's ingredient indices refer to.
+        """
+        return Step(data['text'], data['actions'], data['main_action'],
+                    [ingredients[i] for i in data['ingredients']], data['tools'], data['parameters'],
+                    [QuantitySpan.from_dict(span) for span in data['spans']])
+
+    def __repr__(self):
+        return self.text
+
+
+class StepView:
+    """
+    Class representing a step with units converted and quantities translated.
 
-        temperature_parameters = self.get_temperature_parameters()
+    The step itself is not changed, and the view shares its annotations. The
+    text, ingredients and temperature parameters are computed on first use.
+    """
+
+    __slots__ = ('step', 'target_unit', 'ratio', 'rendered_text', 'ingredient_views')
 
-        to_match = '\d*\.?\d+°C' if target_unit == 'IMPERIAL' else '\d*\.?\d+°F'
-        f_temp = convert_celsius_to_fahrenheit if target_unit == 'IMPERIAL' else convert_fahrenheit_to_celsius
+    def __init__(self, step, target_unit=None, ratio=1):
+        self.step = step
+        self.target_unit = target_unit
+        self.ratio = ratio
+        self.rendered_text = None
+        self.ingredient_views = None
 
-        converted_parameters = []
+    @property
+    def text(self):
+        if self.rendered_text is None:
+            self.rendered_text = self.step.render(self.target_unit, self.ratio)
+        return self.rendered_text
+
+    def get_actions(self):
+        return self.step.get_actions()
 
-        for p in temperature_parameters:
-            while re.search(to_match, p):
-                temperature = float(re.search(to_match, p).group()[:-2])
-                converted, unit = f_temp(temperature)
-                p = re.sub(to_match, str(converted) + unit, p, 1)
-            converted_parameters.append(p)
+    def get_main_action(self):
+        return self.step.get_main_action()
+
+    def get_ingredients(self):
+        if self.ingredient_views is None:
+            self.ingredient_views = tuple(IngredientView(i, self.target_unit, self.ratio)
+                                          for i in self.step.get_ingredients())
+        return self.ingredient_views
+
+    def get_tools(self):
+        return self.step.get_tools()
+
+    def get_time_parameters(self):
+        return self.step.get_time_parameters()
 
-        self.parameters['temperature'] = converted_parameters
+    def get_temperature_parameters(self):
+        temperature_parameters = self.step.get_temperature_parameters()
+        if self.target_unit is None:
+            return temperature_parameters
+        return tuple(convert_temperatures(p, self.target_unit) for p in temperature_parameters)
 
-        for original, converted in zip(temperature_parameters, converted_parameters):
-            self.text = self.text.replace(original, converted)
+    def convert_units(self, target_unit):
+        """
+        Converts the units in this view to the target unit.
 
-        units = METRIC_TO_IMPERIAL if target_unit == 'IMPERIAL' else IMPERIAL_TO_METRIC
-        f = convert_metric_to_imperial if target_unit == 'IMPERIAL' else convert_imperial_to_metric
+        Args:
+            target_unit: Target unit. Valid units are 'METRIC' and 'IMPERIAL'.
 
-        for unit in reversed(units.keys()):
-            expressions = [f' {unit}', unit]
-            for e in expressions:
-                matches = re.findall(f'\d*\.?\d+{e}', self.text)
-                for match in matches:
-                    q_str = match.replace(e, '')
-                    q = int(q_str) if q_str.isnumeric() else float(q_str)
-                    converted_quantity, converted_measurement = f(q, unit)
-                    self.text = self.text.replace(match, ' '.join(
-                        [str(converted_quantity), converted_measurement]))
+        Returns:
+            New view with converted units, or this view if the target unit is invalid.
+        """
+        if target_unit != 'METRIC' and target_unit != 'IMPERIAL':
+            return self
+        return StepView(self.step, target_unit, self.ratio)
 
     def translate_portion_size(self, ratio):
         """
-        Translates the ingredient portions in this step by a ratio.
+        Translates the ingredient portions in this view by a ratio.
 
         Args:
             ratio: Ratio to translate by.
+
+        Returns:
+            New view with translated portions.
         """
-        for unit in itertools.chain(reversed(METRIC_TO_IMPERIAL.keys()), reversed(IMPERIAL_TO_METRIC.keys())):
-            expressions = [f' {unit}', unit]
-            for e in expressions:
-                matches = re.findall(f'\d*\.?\d+{e}', self.text)
-                for match in matches:
-                    q_str = match.replace(e, '')
-                    q = int(q_str) if q_str.isnumeric() else float(q_str)
-                    self.text = self.text.replace(match, ' '.join(
-                        [str(q * ratio), unit]))
+        return StepView(self.step, self.target_unit, self.ratio * ratio)
 
     def __repr__(self):
         return self.text
+
+
+def intern_all(strings):
+    """
+    Interns strings so that equal strings across steps and recipes share one object.
+
+    Args:
+        strings: Iterable of strings.
+
+    Returns:
+        Tuple of interned strings.
+    """
+    return tuple(sys.intern(s) for s in strings)
@@ -0,0 +1,289 @@
+"""This file provides a command line tool to extract large dumps of meals one at a time."""
+
+import argparse
+import codecs
+import json
+import os
+import re
+import sys
+import time
+
+from bulk import extract_recipe, init_worker
+from download import process_meal
+from extract import EXTRACTION_TIERS
+
+# Number of bytes read from the input at a time
+CHUNK_SIZE = 1 << 16
+
+# Number of recipes written between checkpoints
+DEFAULT_CHECKPOINT_EVERY = 100
+
+# Characters allowed between meals: whitespace, and the brackets and commas of a JSON array
+SEPARATORS = ' \t\r\n,['
+END = ']'
+
+# Start of a response from the API, whose meals are streamed like a bare array
+MEALS_PREFIX = re.compile(r'\s*\{\s*"meals"\s*:\s*\[')
+
+# Number of characters read before checking for MEALS_PREFIX
+PREFIX_LOOKAHEAD = 64
+
+# Number of characters a single meal may take. Meals from the API are a few thousand.
+MAX_MEAL_SIZE = 1 << 20
+
+# Characters a number can end with, and literals a value can start with
+NUMBER_CHARS = frozenset('0123456789.eE+-')
+LITERALS = ('true', 'false', 'null', 'NaN', 'Infinity', '-Infinity')
+
+
+def is_truncated(text, error):
+    """
+    Checks if text failed to decode only because it ends in the middle of a value.
+
+    Args:
+        text: Text that failed to decode.
+        error: JSONDecodeError raised when decoding it.
+
+    Returns:
+        True, if more text could complete the value. False, if the text is invalid whatever follows.
+    """
+    rest = text[error.pos:]
+    if error.msg.startswith('Unterminated string'):
+        return True
+    if error.msg.startswith('Invalid \\uXXXX escape'):
+        return len(rest) < 6
+    return all(c in NUMBER_CHARS for c in rest) or any(
+        literal.startswith(rest) for literal in LITERALS)
+
+
+def iter_meals(f, offset=0, chunk_size=CHUNK_SIZE, max_meal_size=MAX_MEAL_SIZE):
+    """
+    Reads meals one at a time from a file of meals returned by API.
+
+    The file may hold a JSON array of meals, a meal per line, or a response
+    from the API with the meals under 'meals'. Only the meal being decoded is
+    held in memory, however large the file is.
+
+    Args:
+        f: File opened in binary mode.
+        offset: Byte offset to start reading at. Must be the start of the file or an offset yielded before.
+        chunk_size: Number of bytes read at a time.
+        max_meal_size: Number of characters a single meal may take.
+
+    Yields:
+        Tuples of meal and the byte offset just past it.
+
+    Raises:
+        ValueError: If the file holds something other than meals, or ends in the middle of one.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    f.seek(offset)
+    text = ''
+    eof = False
+
+    def read():
+        chunk = f.read(chunk_size)
+        return utf8.decode(chunk, final=not chunk), not chunk
+
+    if offset == 0:
+        while not eof and len(text) < PREFIX_LOOKAHEAD:
+            more, eof = read()
+            text += more
+        m = MEALS_PREFIX.match(text)
+        if m:
+            offset += len(text[:m.end()].encode('utf-8'))
+            text = text[m.end():]
+
+    while True:
+        i = 0
+        while i < len(text) and text[i] in SEPARATORS:
+            i += 1
+        if i:
+            offset += len(text[:i].encode('utf-8'))
+            text = text[i:]
+        if text.startswith(END):
+            return
+
+        if text:
+            try:
+                meal, end = decoder.raw_decode(text)
+            except json.JSONDecodeError as e:
+                if not is_truncated(text, e):
+                    raise ValueError(
+                        f'Invalid meal at byte {offset}: {e.msg}') from e
+                if eof:
+                    raise ValueError(
+                        f'Incomplete meal at byte {offset}') from e
+            else:
+                if not isinstance(meal, dict):
+                    raise ValueError(f'Expected a meal at byte {offset}')
+                offset += len(text[:end].encode('utf-8'))
+                text = text[end:]
+                yield meal, offset
+                continue
+        elif eof:
+            return
+
+        # The meal continues past what has been read so far
+        if len(text) > max_meal_size:
+            raise ValueError(
+                f'Meal at byte {offset} is longer than {max_meal_size} characters')
+        more, eof = read()
+        text += more
+
+
+class Checkpoint:
+    """
+    Class representing how far a stream has been extracted.
+
+    A checkpoint is only written once the parsed recipes before it have been
+    flushed to the output, so on resuming the output is truncated to its size and
+    the input is read again from its offset.
+    """
+
+    def __init__(self, path, input_path, input_offset=0, output_size=0, recipes=0):
+        self.path = path
+        self.input_path = input_path
+        self.input_offset = input_offset
+        self.output_size = output_size
+        self.recipes = recipes
+
+    def save(self):
+        """
+        Writes the checkpoint, replacing the previous one in a single step.
+        """
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'input_path': self.input_path,
+                'input_offset': self.input_offset,
+                'output_size': self.output_size,
+                'recipes': self.recipes
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    @staticmethod
+    def load(path):
+        """
+        Reads a checkpoint.
+
+        Returns:
+            Checkpoint, or None if there is no checkpoint at path.
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        return Checkpoint(path, data['input_path'], data['input_offset'],
+                          data['output_size'], data['recipes'])
+
+
+def parse_meal(meal):
+    """
+    Extracts a meal returned by API.
+
+    Returns:
+        Parsed recipe as a dictionary, as written by bulk.py.
+        The dictionary holds the recipe name and an error message if extraction failed.
+    """
+    try:
+        raw_recipe = process_meal(meal)
+    except Exception as e:
+        return {'name': meal.get('strMeal'), 'error': repr(e)}
+    _, _, record = extract_recipe(raw_recipe)
+    return record
+
+
+def save_checkpoint(output, checkpoint):
+    """
+    Flushes the output to disk, then saves a checkpoint at its end.
+    """
+    output.flush()
+    os.fsync(output.fileno())
+    checkpoint.output_size = output.tell()
+    checkpoint.save()
+
+
+def stream(input_file, output, checkpoint, checkpoint_every=DEFAULT_CHECKPOINT_EVERY, progress_every=100):
+    """
+    Extracts meals one at a time and appends them as JSONL, checkpointing as it goes.
+
+    Args:
+        input_file: File of meals opened in binary mode.
+        output: File opened in binary append mode, truncated to the checkpointed output size.
+        checkpoint: Checkpoint to start from, which is updated and saved.
+        checkpoint_every: Number of recipes between checkpoints.
+        progress_every: Number of recipes between progress reports.
+
+    Returns:
+        Number of recipes extracted in this run.
+    """
+    start = time.perf_counter()
+    count = 0
+    for meal, offset in iter_meals(input_file, checkpoint.input_offset):
+        output.write(json.dumps(parse_meal(meal)).encode('utf-8') + b'\n')
+        count += 1
+        checkpoint.input_offset = offset
+        checkpoint.recipes += 1
+        if count % checkpoint_every == 0:
+            save_checkpoint(output, checkpoint)
+        if count % progress_every == 0:
+            rate = count / (time.perf_counter() - start)
+            print(f'{checkpoint.recipes} recipes, {rate:.1f} recipes/s',
+                  file=sys.stderr)
+    save_checkpoint(output, checkpoint)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('input',
+                        help='JSON array, JSONL file or API response of meals as returned by API')
+    parser.add_argument('-o', '--output', required=True,
+                        help='JSONL file to write parsed recipes to')
+    parser.add_argument('--checkpoint',
+                        help='Path to the checkpoint (default: the output path with .checkpoint appended)')
+    parser.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY,
+                        help='Number of recipes between checkpoints')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the checkpoint instead of starting over')
+    parser.add_argument('--progress-every', type=int, default=100,
+                        help='Number of recipes between progress reports')
+    parser.add_argument('--step-cache',
+                        help='Path to a step cache, so recipes extracted before only parse their new or changed steps')
+    parser.add_argument('--tier', choices=EXTRACTION_TIERS,
+                        help='How to find the sentences that start steps, from most accurate to fastest '
+                        '(default: COOKBOOK_EXTRACTION_TIER or tagger)')
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or f'{args.output}.checkpoint'
+    checkpoint = Checkpoint.load(checkpoint_path) if args.resume else None
+    if checkpoint is None:
+        checkpoint = Checkpoint(checkpoint_path, os.path.abspath(args.input))
+    elif checkpoint.input_path != os.path.abspath(args.input):
+        parser.error(
+            f'checkpoint is for {checkpoint.input_path}, not {args.input}')
+    elif checkpoint.recipes:
+        print(f'Resuming after {checkpoint.recipes} recipes at byte {checkpoint.input_offset}',
+              file=sys.stderr)
+
+    init_worker(args.step_cache, extraction_tier=args.tier)
+    # Drop whatever was written after the checkpoint, or all of it when starting over
+    with open(args.output, 'ab') as output:
+        output.truncate(checkpoint.output_size)
+    start = time.perf_counter()
+    with open(args.input, 'rb') as input_file, open(args.output, 'ab') as output:
+        count = stream(input_file, output, checkpoint,
+                       args.checkpoint_every, args.progress_every)
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else 0
+    print(f'Extracted {count} recipes in {elapsed:.1f}s, {rate:.2f} recipes/s, '
+          f'{checkpoint.recipes} in total', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
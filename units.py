@@ -1,5 +1,7 @@
 """This file provides operations and constants for handling imperial and metric units."""
 
+import re
+
 IMPERIAL_TO_METRIC = {
     'tsp': (4.92892, 'ml'),
     'teaspoon': (4.92892, 'ml'),
@@ -42,6 +44,29 @@ METRIC_TO_IMPERIAL = {
 }
 
 
+def compile_quantity_pattern(units):
+    """
+    Compiles a pattern matching a quantity followed by any of the units.
+
+    Args:
+        units: Units to match. A unit must not be followed by a letter, so 'g' does not match the start of 'garlic'.
+
+    Returns:
+        Compiled pattern with the quantity and unit as groups 1 and 2.
+    """
+    aliases = '|'.join(re.escape(unit)
+                       for unit in sorted(units, key=len, reverse=True))
+    return re.compile(rf'(\d*\.?\d+) ?({aliases})(?![A-Za-z])')
+
+
+QUANTITY_PATTERN = compile_quantity_pattern(
+    list(IMPERIAL_TO_METRIC) + list(METRIC_TO_IMPERIAL))
+
+CELSIUS_PATTERN = re.compile(r'(\d*\.?\d+)°C')
+FAHRENHEIT_PATTERN = re.compile(r'(\d*\.?\d+)°F')
+DEGREES_PATTERN = re.compile(r'(\d*\.?\d+)(°[CF])')
+
+
 def is_imperial(measurement):
     return measurement in IMPERIAL_TO_METRIC.keys()
 
@@ -97,3 +122,28 @@ def convert_fahrenheit_to_celsius(temperature):
 
 def convert_celsius_to_fahrenheit(temperature):
     return round((temperature * (9 / 5)) + 32, 2), '°F'
+
+
+def convert_temperatures(text, target_unit):
+    """
+    Converts every temperature in text to the target unit.
+
+    Args:
+        text: Text with temperatures like '200°C'.
+        target_unit: Target unit. Valid units are 'METRIC' and 'IMPERIAL'.
+
+    Returns:
+        Text with converted temperatures.
+    """
+    if target_unit == 'IMPERIAL':
+        pattern, f = CELSIUS_PATTERN, convert_celsius_to_fahrenheit
+    elif target_unit == 'METRIC':
+        pattern, f = FAHRENHEIT_PATTERN, convert_fahrenheit_to_celsius
+    else:
+        return text
+
+    def convert(match):
+        converted, unit = f(float(match.group(1)))
+        return str(converted) + unit
+
+    return pattern.sub(convert, text)